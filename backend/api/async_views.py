@@ -0,0 +1,185 @@
+"""
+Асинхронные версии эндпоинтов, которые в основном ждут ввода-вывода.
+
+Подключаются вместо обычных при ASGI_ENABLED. DRF 3.12 не умеет
+асинхронные представления, поэтому это обычные представления Django,
+а аутентификация и ORM вызываются через sync_to_async: запросы к базе
+выполняются в общем потоке и переиспользуют его соединение.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django_filters.utils import translate_validation
+from foodgram_backend.streaming import AsyncStreamingHttpResponse
+from functools import wraps
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import (
+    NotAuthenticated,
+    ParseError,
+    PermissionDenied,
+)
+from rest_framework.views import exception_handler
+
+from api.filters import RecipeFilterSet
+from api.serializers import UserAvatarSerializer
+from api.utils import shopping_list, write_to_file
+from recipes.constants import (
+    NDJSON_CONTENT_TYPE,
+    RECIPE_FRONTEND_URL,
+    SHOPPING_LIST_CHUNK_SIZE,
+    SHOPPING_LIST_FORMATS,
+    SHORT_LINK_CACHE_TIMEOUT,
+)
+from recipes.models import Recipe, ShortLink
+from recipes.transfer import export_batches, ndjson_lines
+
+
+def async_api_view(methods, login_required=False):
+    """
+    Аутентифицирует запрос токеном и отдаёт ошибки в формате DRF.
+
+    Как и в REST_FRAMEWORK, сессия не используется: без токена
+    пользователь анонимный, и ленивый request.user из
+    AuthenticationMiddleware не обращается к базе в асинхронном коде.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            try:
+                result = await sync_to_async(
+                    TokenAuthentication().authenticate
+                )(request)
+                request.user = (
+                    AnonymousUser() if result is None else result[0]
+                )
+                if login_required and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                return await view(request, *args, **kwargs)
+            except Exception as ex:
+                response = exception_handler(ex, {})
+                if response is None:
+                    raise
+                return JsonResponse(
+                    response.data,
+                    status=response.status_code,
+                    safe=False,
+                    json_dumps_params={"ensure_ascii": False},
+                )
+
+        # csrf_exempt из Django 3.2 превратил бы корутину в обычную функцию.
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+@async_api_view(["GET"])
+async def get_short_link(request, pk):
+    if not await sync_to_async(Recipe.objects.filter(pk=pk).exists)():
+        raise Http404
+    short_link = await sync_to_async(ShortLink.objects.get_for_recipe)(pk)
+    short_url = request.build_absolute_uri(
+        reverse("short-link", args=[short_link.code])
+    )
+    return JsonResponse({"short-link": short_url})
+
+
+@async_api_view(["GET"], login_required=True)
+async def download_shopping_list(request):
+    file_format = request.GET.get("format", "txt")
+    if file_format not in SHOPPING_LIST_FORMATS:
+        return JsonResponse(
+            {
+                "format": "Допустимые форматы: "
+                + ", ".join(SHOPPING_LIST_FORMATS)
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+            json_dumps_params={"ensure_ascii": False},
+        )
+    return write_to_file(
+        shopping_list(request.user).iterator(
+            chunk_size=SHOPPING_LIST_CHUNK_SIZE
+        ),
+        file_format=file_format,
+        response_class=AsyncStreamingHttpResponse,
+    )
+
+
+@async_api_view(["PUT", "DELETE"], login_required=True)
+async def avatar(request):
+    user = request.user
+    if request.method == "DELETE":
+        user.avatar = None
+        await sync_to_async(user.save)(update_fields=["avatar"])
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    try:
+        data = json.loads(request.body)
+    except ValueError as ex:
+        raise ParseError(f"JSON parse error - {ex}")
+
+    def save():
+        serializer = UserAvatarSerializer(user, data=data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return serializer.data
+
+    return JsonResponse(await sync_to_async(save)())
+
+
+async def export_lines(queryset):
+    """Строки NDJSON; каждая пачка рецептов читается через sync_to_async."""
+    batches = export_batches(queryset)
+    next_batch = sync_to_async(next)
+    while True:
+        batch = await next_batch(batches, None)
+        if batch is None:
+            return
+        yield "".join(ndjson_lines(batch))
+
+
+@async_api_view(["GET"], login_required=True)
+async def export_recipes(request):
+    """Выгрузка рецептов (с фильтрами списка) потоком NDJSON."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+
+    def filtered():
+        filterset = RecipeFilterSet(
+            request.GET, queryset=Recipe.objects.all(), request=request
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    queryset = await sync_to_async(filtered)()
+    return AsyncStreamingHttpResponse(
+        export_lines(queryset),
+        content_type=f"{NDJSON_CONTENT_TYPE}; charset=utf-8",
+    )
+
+
+async def short_link_redirect(request, code):
+    """Перенаправляет короткую ссылку на страницу рецепта."""
+    key = f"short_link:{code}"
+    recipe_id = await sync_to_async(cache.get)(key)
+    if recipe_id is None:
+        recipe_id = await sync_to_async(get_object_or_404)(
+            ShortLink.objects.values_list("recipe_id", flat=True), code=code
+        )
+        await sync_to_async(cache.set)(
+            key, recipe_id, SHORT_LINK_CACHE_TIMEOUT
+        )
+    return redirect(RECIPE_FRONTEND_URL.format(recipe_id))
@@ -0,0 +1,51 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Строит ETag из значений, от которых зависит ответ."""
+    digest = hashlib.md5(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def queryset_validators(queryset):
+    """ETag и Last-Modified для списка по Max(updated_at) и Count."""
+    state = queryset.aggregate(
+        last_modified=Max("updated_at"), count=Count("pk")
+    )
+    return (
+        make_etag(state["last_modified"], state["count"]),
+        state["last_modified"],
+    )
+
+
+def conditional_get(
+    request, etag, last_modified, handler, vary=(), **cache_control
+):
+    """
+    Условный GET: 304 при совпадении валидаторов, иначе ответ handler().
+
+    В обоих случаях ответ получает ETag, Last-Modified, Cache-Control
+    и, если передан vary, заголовок Vary.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = handler()
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    patch_cache_control(response, **cache_control)
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
@@ -1,29 +1,40 @@
+from django.db.models import Count, Exists, OuterRef
 from django_filters.rest_framework import (
-    AllValuesMultipleFilter,
     BooleanFilter,
     CharFilter,
+    ChoiceFilter,
     FilterSet,
+    ModelMultipleChoiceFilter,
 )
 
-from recipes.models import Ingredient, Recipe
+from recipes.constants import TAGS_MATCH_ALL, TAGS_MATCH_CHOICES
+from recipes.models import Ingredient, Recipe, Tag
 
 
 class IngredientFilterSet(FilterSet):
     """Фильтр для модели Ingredient."""
 
-    name = CharFilter(lookup_expr="istartswith")
+    name = CharFilter(method="filter_name")
 
     class Meta:
         model = Ingredient
         fields = ("name",)
 
+    def filter_name(self, queryset, name, value):
+        return queryset.name_startswith(value)
+
 
 class RecipeFilterSet(FilterSet):
     """Фильтр для модели Recipe."""
 
-    tags = AllValuesMultipleFilter(
+    tags = ModelMultipleChoiceFilter(
         field_name="tags__slug",
-        lookup_expr="contains"
+        to_field_name="slug",
+        queryset=Tag.objects.all(),
+        method="filter_tags",
+    )
+    tags_match = ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES, method="filter_tags_match"
     )
     is_favorited = BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = BooleanFilter(method="filter_is_in_shopping_cart")
@@ -32,6 +43,31 @@ class RecipeFilterSet(FilterSet):
         model = Recipe
         fields = ["author", "tags"]
 
+    def filter_tags(self, queryset, name, value):
+        """
+        Фильтр по тегам через полусоединение без DISTINCT.
+
+        По умолчанию рецепт подходит, если у него есть хотя бы один
+        из тегов (EXISTS), при tags_match=all — если есть все теги
+        (GROUP BY recipe_id HAVING COUNT = n).
+        """
+        if not value:
+            return queryset
+        tag_ids = {tag.pk for tag in value}
+        recipe_tags = Recipe.tags.through.objects.filter(tag_id__in=tag_ids)
+        if self.form.cleaned_data.get("tags_match") == TAGS_MATCH_ALL:
+            return queryset.filter(
+                pk__in=recipe_tags.values("recipe_id").annotate(
+                    matched=Count("tag_id")
+                ).filter(matched=len(tag_ids)).values("recipe_id")
+            )
+        return queryset.filter(
+            Exists(recipe_tags.filter(recipe_id=OuterRef("pk")))
+        )
+
+    def filter_tags_match(self, queryset, name, value):
+        return queryset
+
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             user = self.request.user
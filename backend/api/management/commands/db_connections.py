@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит настройки соединений с базой и, для PostgreSQL, "
+        "число соединений приложения по состояниям"
+    )
+
+    def handle(self, *args, **options):
+        db_settings = connection.settings_dict
+        self.stdout.write(f"Backend: {connection.vendor}")
+        self.stdout.write(f"CONN_MAX_AGE: {db_settings['CONN_MAX_AGE']}")
+        self.stdout.write(
+            f"Health checks: {settings.DB_CONN_HEALTH_CHECKS} "
+            f"(после {settings.DB_HEALTH_CHECK_IDLE_SECONDS} с простоя)"
+        )
+        self.stdout.write(f"PgBouncer mode: {settings.DB_PGBOUNCER}")
+        self.stdout.write(
+            "Statement timeout, ms: "
+            f"{settings.DB_STATEMENT_TIMEOUT or 'нет'}"
+        )
+        if connection.vendor != "postgresql":
+            return
+        application_name = db_settings["OPTIONS"].get("application_name")
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW max_connections")
+            max_connections = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT COALESCE(state, 'unknown'), COUNT(*) "
+                "FROM pg_stat_activity "
+                "WHERE datname = current_database() "
+                "AND application_name = %s "
+                "GROUP BY 1 ORDER BY 1",
+                [application_name],
+            )
+            states = cursor.fetchall()
+            cursor.execute(
+                "SELECT COUNT(*) FROM pg_stat_activity "
+                "WHERE datname = current_database()"
+            )
+            total = cursor.fetchone()[0]
+        self.stdout.write(f"max_connections: {max_connections}")
+        self.stdout.write(f"Всего соединений с базой: {total}")
+        self.stdout.write(f"Соединения приложения {application_name}:")
+        for state, count in states:
+            self.stdout.write(f"  {state}: {count}")
+        if settings.DB_PGBOUNCER:
+            self.stdout.write(
+                "Через PgBouncer видны серверные соединения пула; "
+                "statement_timeout задаётся для роли базы."
+            )
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from api.filters import RecipeFilterSet
+from recipes.constants import DEFAULT_PAGE_SIZE
+from recipes.models import Recipe, Tag, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит планы запросов ленты рецептов для типовых комбинаций "
+        "фильтров и отмечает полные просмотры таблиц"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL)",
+        )
+
+    def get_combinations(self):
+        user = User.objects.order_by("pk").first()
+        slugs = list(Tag.objects.values_list("slug", flat=True)[:2])
+        combinations = [("Без фильтров", {}, None)]
+        if user is not None:
+            combinations.append(("Автор", {"author": user.pk}, None))
+            combinations.append(
+                ("Избранное", {"is_favorited": "1"}, user)
+            )
+            combinations.append(
+                ("Корзина", {"is_in_shopping_cart": "1"}, user)
+            )
+        if slugs:
+            combinations.append(("Один тег", {"tags": slugs[:1]}, None))
+            combinations.append(("Несколько тегов", {"tags": slugs}, None))
+            combinations.append(
+                (
+                    "Все теги",
+                    {"tags": slugs, "tags_match": "all"},
+                    None,
+                )
+            )
+            if user is not None:
+                combinations.append(
+                    (
+                        "Автор и теги",
+                        {"author": user.pk, "tags": slugs},
+                        None,
+                    )
+                )
+        return combinations
+
+    @staticmethod
+    def is_full_scan(line):
+        if connection.vendor == "postgresql":
+            return "Seq Scan" in line
+        return "SCAN " in line and "INDEX" not in line
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options["analyze"] = True
+        full_scans = 0
+        for title, params, user in self.get_combinations():
+            request = factory.get("/api/recipes/", params)
+            request.user = user or AnonymousUser()
+            filterset = RecipeFilterSet(
+                request.GET, queryset=Recipe.objects.all(), request=request
+            )
+            if not filterset.is_valid():
+                self.stdout.write(
+                    self.style.ERROR(f"{title}: {dict(filterset.errors)}")
+                )
+                continue
+            plan = filterset.qs[:DEFAULT_PAGE_SIZE].explain(
+                **explain_options
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for line in plan.splitlines():
+                if self.is_full_scan(line):
+                    full_scans += 1
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+        if full_scans:
+            self.stdout.write(
+                self.style.WARNING(f"Полных просмотров таблиц: {full_scans}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Success"))
@@ -0,0 +1,14 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatContentNegotiation(DefaultContentNegotiation):
+    """
+    Согласование контента без учёта параметра ?format=
+
+    Используется в действиях, где ?format= выбирает формат
+    выгружаемого файла, а не рендерер DRF.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
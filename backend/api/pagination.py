@@ -1,10 +1,240 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
-from recipes.constants import DEFAULT_PAGE_SIZE
+from recipes.constants import (
+    APPROXIMATE_COUNT_THRESHOLD,
+    COUNT_MODE_APPROXIMATE,
+    COUNT_MODE_NONE,
+    COUNT_QUERY_PARAM,
+    CURSOR_MODE,
+    CURSOR_POSITION_SEPARATOR,
+    DEFAULT_PAGE_SIZE,
+    PAGINATION_QUERY_PARAM,
+)
+
+
+def approximate_count(queryset):
+    """
+    Оценка числа строк по статистике PostgreSQL (pg_class.reltuples).
+
+    Подходит только для запросов без фильтров; в остальных случаях
+    возвращает None.
+    """
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] > 0 else None
+
+
+class NoCountPage(Page):
+    """Страница, которая определяет наличие следующей без COUNT(*)."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class FoodgramPaginator(Paginator):
+    """
+    Paginator с настраиваемым подсчётом общего числа объектов.
+
+    count_mode: exact — обычный COUNT(*), approximate — оценка
+    PostgreSQL для больших таблиц без фильтров, none — без подсчёта,
+    следующая страница определяется по лишней выбранной строке.
+    """
+
+    def __init__(self, *args, count_mode=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_mode = count_mode
+
+    @cached_property
+    def count(self):
+        if self.count_mode == COUNT_MODE_NONE:
+            return None
+        if self.count_mode == COUNT_MODE_APPROXIMATE:
+            estimate = approximate_count(self.object_list)
+            if estimate is not None and estimate > APPROXIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return 0
+        return super().num_pages
+
+    def validate_number(self, number):
+        if self.count_mode != COUNT_MODE_NONE:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы должен быть целым числом")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        return number
+
+    def page(self, number):
+        if self.count_mode != COUNT_MODE_NONE:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return NoCountPage(
+            objects[:self.per_page],
+            number,
+            self,
+            has_more=len(objects) > self.per_page,
+        )
+
+
+class FoodgramCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация: стоимость страницы не зависит от её номера.
+
+    Порядок — первое поле из запроса или Meta.ordering модели и
+    первичный ключ в том же направлении. В отличие от CursorPagination
+    из DRF, где курсор хранит только первое поле и смещение среди
+    совпадающих значений, позиция — пара (поле, pk), и страница
+    выбирается условием (field, pk) < (value, pk) без OFFSET, даже
+    если у многих записей одинаковое created_at.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        first = (queryset.query.order_by or queryset.model._meta.ordering)[0]
+        if first.lstrip("-") in ("pk", "id"):
+            return (first,)
+        return first, "-pk" if first.startswith("-") else "pk"
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = super()._get_position_from_instance(instance, ordering)
+        pk = instance["pk"] if isinstance(instance, dict) else instance.pk
+        return f"{value}{CURSOR_POSITION_SEPARATOR}{pk}"
+
+    def keyset_filter(self, queryset, position, descending):
+        attr = self.ordering[0].lstrip("-")
+        opts = queryset.model._meta
+        if attr in queryset.query.annotations:
+            field = queryset.query.annotations[attr].output_field
+        else:
+            field = opts.pk if attr == "pk" else opts.get_field(attr)
+        try:
+            value, pk = position.rsplit(CURSOR_POSITION_SEPARATOR, 1)
+            value = field.to_python(value)
+            pk = opts.pk.to_python(pk)
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        lookup = "lt" if descending else "gt"
+        return Q(**{f"{attr}__{lookup}": value}) | Q(
+            **{attr: value, f"pk__{lookup}": pk}
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(
+                    queryset,
+                    current_position,
+                    reverse != self.ordering[0].startswith("-"),
+                )
+            )
+        # Позиции уникальны, поэтому смещение DRF здесь всегда 0.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        has_current = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = (
+                has_current, following_position is not None
+            )
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next, self.has_previous = (
+                following_position is not None, has_current
+            )
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template:
+            self.display_page_controls = True
+        return self.page
 
 
 class FoodgramPagination(PageNumberPagination):
-    """Пагинация для проекта."""
+    """
+    Пагинация для проекта.
+
+    По умолчанию постраничная; с ?pagination=cursor (и в ссылках,
+    содержащих cursor) переключается на курсорную. Размер страницы
+    ограничен PAGINATION_MAX_PAGE_SIZE, а подсчёт общего числа объектов
+    задаётся PAGINATION_COUNT_MODE или отключается параметром ?count=false.
+    """
 
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = "limit"
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    cursor_pagination_class = FoodgramCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if (
+            request.query_params.get(PAGINATION_QUERY_PARAM) == CURSOR_MODE
+            or FoodgramCursorPagination.cursor_query_param
+            in request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.count_mode = settings.PAGINATION_COUNT_MODE
+        if request.query_params.get(COUNT_QUERY_PARAM) == "false":
+            self.count_mode = COUNT_MODE_NONE
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, *args, **kwargs):
+        return FoodgramPaginator(*args, count_mode=self.count_mode, **kwargs)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
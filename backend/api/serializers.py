@@ -1,7 +1,20 @@
+from django.db import models, transaction
 from rest_framework import serializers
 
-from api.view_fields import Base64ImageField
-from recipes.constants import MIN_AMOUNT_VALUE, NON_VALID_USERNAME
+from api.utils import get_recipes_limit
+from api.view_fields import (
+    Base64ImageField,
+    ImageRenditionsField,
+    PrimaryKeyListField,
+)
+from api.viewer_state import get_viewer_state
+from recipes.constants import (
+    AVATAR_RENDITIONS,
+    BATCH_MAX_SIZE,
+    MIN_AMOUNT_VALUE,
+    NON_VALID_USERNAME,
+    RECIPE_RENDITIONS,
+)
 from recipes.models import (
     FavouriteRecipe,
     Follow,
@@ -22,21 +35,46 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
 
 
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    Загружает ViewerState сразу для всех объектов страницы.
+
+    Дочерний сериализатор сообщает, какие id ему понадобятся, через
+    preload_viewer_state(state, objects).
+    """
+
+    def to_representation(self, data):
+        objects = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        request = self.context.get("request")
+        if request is not None:
+            self.child.preload_viewer_state(
+                get_viewer_state(request), objects
+            )
+        return super().to_representation(objects)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор модели User."""
 
     avatar = Base64ImageField(required=False)
+    avatar_renditions = ImageRenditionsField(AVATAR_RENDITIONS, "avatar")
     is_subscribed = serializers.SerializerMethodField()
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=True)
 
     def get_is_subscribed(self, obj):
-        return (
-            self.context.get("request").user.is_authenticated
-            and self.context.get("request").user in obj.followers.all()
+        return get_viewer_state(self.context.get("request")).is_subscribed(
+            obj.pk
         )
 
+    @staticmethod
+    def preload_viewer_state(state, users):
+        state.load_authors(user.pk for user in users)
+
     class Meta:
+        list_serializer_class = ViewerStateListSerializer
         fields = (
             "email",
             "id",
@@ -44,6 +82,7 @@ class UserSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "avatar",
+            "avatar_renditions",
             "is_subscribed",
         )
         model = User
@@ -84,7 +123,12 @@ class FollowSerializer(serializers.ModelSerializer):
     recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
 
+    @staticmethod
+    def preload_viewer_state(state, follows):
+        state.load_authors(follow.author_id for follow in follows)
+
     class Meta:
+        list_serializer_class = ViewerStateListSerializer
         model = Follow
         fields = ("user", "author", "recipes_count", "recipes")
         extra_kwargs = {
@@ -93,19 +137,13 @@ class FollowSerializer(serializers.ModelSerializer):
         }
 
     def get_recipes_count(self, obj):
-        return obj.author.recipes.count()
+        return obj.author.recipes_count
 
     def get_recipes(self, obj):
         request = self.context.get("request")
-        if "recipes_limit" in request.query_params:
-            limit = request.query_params.get("recipes_limit")
-            try:
-                limit = int(limit)
-            except ValueError:
-                pass
-        else:
-            limit = None
-        recipes = obj.author.recipes.all()[:limit]
+        recipes = getattr(obj.author, "limited_recipes", None)
+        if recipes is None:
+            recipes = obj.author.recipes.all()[:get_recipes_limit(request)]
         serializer = LimitedRecipeSerializer(
             recipes, many=True, context={"request": request}
         )
@@ -144,14 +182,16 @@ class IngredientSerializer(serializers.ModelSerializer):
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор модели RecipeIngredient."""
 
-    id = serializers.SlugRelatedField(
-        queryset=Ingredient.objects.all(), slug_field="id"
+    id = serializers.IntegerField(source="ingredient_id")
+    name = serializers.CharField(source="ingredient.name", read_only=True)
+    measurement_unit = serializers.CharField(
+        source="ingredient.measurement_unit", read_only=True
     )
     amount = serializers.IntegerField(required=True)
 
     class Meta:
         model = RecipeIngredient
-        fields = ("id", "amount")
+        fields = ("id", "name", "measurement_unit", "amount")
 
     def validate_amount(self, value):
         if value < MIN_AMOUNT_VALUE:
@@ -160,32 +200,29 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def to_representation(self, instance):
-        amount = instance.recipe_ingredients.first().amount
-
-        representation = {
-            "id": instance.id,
-            "name": instance.name,
-            "measurement_unit": instance.measurement_unit,
-            "amount": amount,
-        }
 
-        return representation
+# Ингредиенты рецепта вместе с названием и единицей измерения.
+RECIPE_INGREDIENTS_PREFETCH = models.Prefetch(
+    "recipe_ingredients",
+    queryset=RecipeIngredient.objects.select_related("ingredient"),
+)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор модели Recipes."""
 
-    ingredients = RecipeIngredientSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
+    ingredients = RecipeIngredientSerializer(
+        many=True, source="recipe_ingredients"
     )
+    tags = PrimaryKeyListField(queryset=Tag.objects.all())
     image = Base64ImageField()
+    image_renditions = ImageRenditionsField(RECIPE_RENDITIONS, "image")
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     author = UserSerializer(read_only=True)
 
     class Meta:
+        list_serializer_class = ViewerStateListSerializer
         fields = (
             "ingredients",
             "tags",
@@ -194,6 +231,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_renditions",
             "text",
             "cooking_time",
             "id"
@@ -201,23 +239,22 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
 
     def get_is_favorited(self, obj):
-        return (
-            self.context.get("request").user.is_authenticated
-            and obj.favorite_recipes.filter(
-                user=self.context.get("request").user
-            ).exists()
+        return get_viewer_state(self.context.get("request")).is_favorited(
+            obj.pk
         )
 
     def get_is_in_shopping_cart(self, obj):
-        return (
-            self.context.get("request").user.is_authenticated
-            and obj.shopping_buckets.filter(
-                user=self.context.get("request").user
-            ).exists()
-        )
+        return get_viewer_state(
+            self.context.get("request")
+        ).is_in_shopping_cart(obj.pk)
+
+    @staticmethod
+    def preload_viewer_state(state, recipes):
+        state.load_recipes(recipe.pk for recipe in recipes)
+        state.load_authors(recipe.author_id for recipe in recipes)
 
     def validate(self, data):
-        ingredients = data.get("ingredients")
+        ingredients = data.get("recipe_ingredients")
         tags = data.get("tags")
         text = data.get("text")
         cooking_time = data.get("cooking_time")
@@ -226,10 +263,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             errors["ingredients"] = "Поле не может быть пустым."
         else:
             ingredient_list = [
-                dict(ingredient)["id"]
+                ingredient["ingredient_id"]
                 for ingredient in ingredients
             ]
-            if len(set(ingredient_list)) != len(ingredient_list):
+            found = set(
+                Ingredient.objects.filter(
+                    pk__in=ingredient_list
+                ).values_list("pk", flat=True)
+            )
+            missing = [pk for pk in ingredient_list if pk not in found]
+            if missing:
+                errors["ingredients"] = (
+                    "Ингредиенты не найдены: " + ", ".join(map(str, missing))
+                )
+            elif len(set(ingredient_list)) != len(ingredient_list):
                 errors["ingredients"] = "Ингредиенты не должны повторяться."
         if not tags:
             errors["tags"] = "Поле не может быть пустым."
@@ -244,51 +291,69 @@ class RecipeSerializer(serializers.ModelSerializer):
         return data
 
     @staticmethod
-    def create_recipe_ingredients_and_set_tags(
-        recipe,
-        ingredients_data,
-        tags_data
-    ):
-        recipe_ingredients = [
+    def save_recipe_ingredients(recipe, ingredients_data):
+        """
+        Приводит ингредиенты рецепта к ingredients_data.
+
+        Удаляются, обновляются и добавляются только изменившиеся строки.
+        """
+        amounts = {
+            ingredient["ingredient_id"]: ingredient["amount"]
+            for ingredient in ingredients_data
+        }
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).only("id", "ingredient_id", "amount")
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
-                recipe=recipe,
-                ingredient=ingredient['id'],
-                amount=ingredient['amount']
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
             )
-            for ingredient in ingredients_data
-        ]
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
-        recipe.tags.set(tags_data)
-        return recipe
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
-        ingredients_data = validated_data.pop("ingredients", [])
+        ingredients_data = validated_data.pop("recipe_ingredients", [])
         tags_data = validated_data.pop("tags", [])
 
         recipe = Recipe.objects.create(**validated_data)
+        self.save_recipe_ingredients(recipe, ingredients_data)
+        recipe.tags.set(tags_data)
+        return recipe
 
-        return self.create_recipe_ingredients_and_set_tags(
-            recipe,
-            ingredients_data,
-            tags_data
-        )
-
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients_data = validated_data.pop("ingredients", [])
+        ingredients_data = validated_data.pop("recipe_ingredients", [])
         tags_data = validated_data.pop("tags", [])
 
         super().update(instance, validated_data)
-
-        instance.ingredients.clear()
-        instance.tags.clear()
-
-        return self.create_recipe_ingredients_and_set_tags(
-            instance,
-            ingredients_data,
-            tags_data
-        )
+        self.save_recipe_ingredients(instance, ingredients_data)
+        instance.tags.set(tags_data)
+        return instance
 
     def to_representation(self, instance):
+        # У рецептов из списка ингредиенты уже загружены, и повторного
+        # запроса нет; после создания и изменения — один запрос.
+        models.prefetch_related_objects(
+            [instance], RECIPE_INGREDIENTS_PREFETCH
+        )
         representation = super().to_representation(instance)
 
         tags_data = TagSerializer(instance.tags.all(), many=True).data
@@ -301,9 +366,11 @@ class RecipeSerializer(serializers.ModelSerializer):
 class LimitedRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для представления рецептов без лишних полей."""
 
+    image_renditions = ImageRenditionsField(RECIPE_RENDITIONS, "image")
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_renditions", "cooking_time")
 
 
 class BusketFavouriteReprentSerializer(serializers.Serializer):
@@ -351,3 +418,13 @@ class FavouriteRecipeSerializer(
         ).exists():
             raise serializers.ValidationError("Уже добавлен в Избранное.")
         return data
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления или удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE,
+    )
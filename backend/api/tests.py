@@ -0,0 +1,208 @@
+import json
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+from foodgram_backend.asgi import application
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from unittest import mock
+
+from api import async_views
+from api.pagination import FoodgramPagination
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingBusket,
+    Tag,
+    User,
+)
+
+
+# Маршруты режима ASGI_ENABLED, которые проверяются через ASGI-приложение.
+urlpatterns = [
+    path("api/recipes/export/", async_views.export_recipes),
+    path(
+        "api/recipes/download_shopping_cart/",
+        async_views.download_shopping_list,
+    ),
+]
+
+
+class RecipeListQueriesTest(TestCase):
+    """Число запросов на страницу ленты не зависит от её размера."""
+
+    ANONYMOUS_QUERIES = 4
+    AUTHENTICATED_QUERIES = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="author-password",
+        )
+        tags = [
+            Tag.objects.create(name=f"Тег {number}", slug=f"tag{number}")
+            for number in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {number}", measurement_unit="г"
+            )
+            for number in range(3)
+        ]
+        for number in range(210):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=f"Рецепт {number}",
+                text="Текст",
+                cooking_time=1,
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in ingredients
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_list_queries(self, client, queries):
+        # max_page_size читается при объявлении класса, поэтому для
+        # страницы в 200 рецептов ограничение поднимается здесь.
+        with mock.patch.object(FoodgramPagination, "max_page_size", 200):
+            for limit in (6, 50, 200):
+                with self.subTest(limit=limit):
+                    cache.clear()
+                    with self.assertNumQueries(queries):
+                        response = client.get(f"/api/recipes/?limit={limit}")
+                    self.assertEqual(len(response.data["results"]), limit)
+
+    def test_page_size_is_capped(self):
+        response = APIClient().get("/api/recipes/?limit=200")
+        self.assertEqual(
+            len(response.data["results"]), settings.PAGINATION_MAX_PAGE_SIZE
+        )
+
+    def test_anonymous_list(self):
+        self.assert_list_queries(APIClient(), self.ANONYMOUS_QUERIES)
+
+    def test_anonymous_list_from_cache(self):
+        client = APIClient()
+        client.get("/api/recipes/?limit=6")
+        with self.assertNumQueries(0):
+            client.get("/api/recipes/?limit=6")
+
+    def test_authenticated_list(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_list_queries(client, self.AUTHENTICATED_QUERIES)
+
+
+def asgi_get(url, user, query_string=b""):
+    """GET через ASGI-приложение; возвращает статус и тело ответа."""
+    token, _ = Token.objects.get_or_create(user=user)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url,
+        "query_string": query_string,
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Token {token.key}".encode()),
+        ],
+    }
+
+    async def request():
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({"type": "http.request"})
+        start = await communicator.receive_output()
+        body = b""
+        while True:
+            message = await communicator.receive_output()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return start["status"], body
+
+    return async_to_sync(request)()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncStreamingTest(TestCase):
+    """Потоковые ответы под ASGI читают базу вне цикла событий."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="admin-password",
+            is_staff=True,
+        )
+        salt = Ingredient.objects.create(name="Соль", measurement_unit="г")
+        sugar = Ingredient.objects.create(name="Сахар", measurement_unit="г")
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.admin,
+                name=f"Рецепт {number}",
+                text="Текст",
+                cooking_time=1,
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in (salt, sugar)
+            )
+            ShoppingBusket.objects.create(user=cls.admin, recipe=recipe)
+
+    def test_export(self):
+        status, body = asgi_get("/api/recipes/export/", self.admin)
+        self.assertEqual(status, 200)
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [row["name"] for row in rows],
+            ["Рецепт 0", "Рецепт 1", "Рецепт 2"],
+        )
+        self.assertEqual(rows[2]["ingredients"][0]["amount"], 3)
+
+    def test_export_requires_staff(self):
+        user = User.objects.create_user(
+            username="user", email="user@example.com", password="password"
+        )
+        status, _ = asgi_get("/api/recipes/export/", user)
+        self.assertEqual(status, 403)
+
+    def test_shopping_list(self):
+        expected = {
+            "txt": "Сахар (г) — 6\nСоль (г) — 6\n",
+            "csv": (
+                "name,measurement_unit,amount\r\n"
+                "Сахар,г,6\r\nСоль,г,6\r\n"
+            ),
+            "json": json.dumps(
+                [
+                    {"name": "Сахар", "measurement_unit": "г", "amount": 6},
+                    {"name": "Соль", "measurement_unit": "г", "amount": 6},
+                ],
+                ensure_ascii=False,
+            ).replace("}, {", "},\n{"),
+        }
+        for file_format, content in expected.items():
+            with self.subTest(format=file_format):
+                status, body = asgi_get(
+                    "/api/recipes/download_shopping_cart/",
+                    self.admin,
+                    f"format={file_format}".encode(),
+                )
+                self.assertEqual(status, 200)
+                self.assertEqual(body.decode(), content)
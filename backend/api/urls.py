@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 
+from api import async_views
 from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
 
 
@@ -35,3 +37,27 @@ urlpatterns = [
         name='schema-redoc'
     ),
 ]
+
+if settings.ASGI_ENABLED:
+    urlpatterns = [
+        path(
+            "recipes/<int:pk>/get-link/",
+            async_views.get_short_link,
+            name="recipes-get-short-link",
+        ),
+        path(
+            "recipes/download_shopping_cart/",
+            async_views.download_shopping_list,
+            name="recipes-download-shopping-list",
+        ),
+        path(
+            "recipes/export/",
+            async_views.export_recipes,
+            name="recipes-export",
+        ),
+        path(
+            "users/me/avatar/",
+            async_views.avatar,
+            name="users-avatar",
+        ),
+    ] + urlpatterns
@@ -1,30 +1,108 @@
-from collections import defaultdict
-from io import StringIO
-
-from django.http import HttpResponse
+import csv
+import hashlib
+import json
+from django.db import transaction
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
-from recipes.models import Recipe
+from recipes.constants import (
+    BATCH_ABSENT,
+    BATCH_CREATED,
+    BATCH_DELETED,
+    BATCH_EXISTS,
+    BATCH_NOT_FOUND,
+    RECIPE_FEED_VERSION_KEY,
+    SHOPPING_LIST_FILENAME,
+    SHOPPING_LIST_FORMATS,
+)
+from recipes.counters import refresh_counters
+from recipes.models import Recipe, RecipeIngredient
+from recipes.versions import get_version
+
+
+class Echo:
+    """Буфер, возвращающий записанную строку вместо её хранения."""
+
+    def write(self, value):
+        return value
 
 
-def write_to_file(data):
-    unpacked_data = [(name, amount) for name, amount in data]
+def txt_rows(data):
+    for name, measurement_unit, amount in data:
+        yield f"{name} ({measurement_unit}) — {amount}\n"
 
-    file_buffer = StringIO()
-    ingredients = defaultdict(int)
 
-    for name, amount in unpacked_data:
-        ingredients[name] += amount
-        file_buffer.write(f"{name} — {amount}g\n")
+def csv_rows(data):
+    writer = csv.writer(Echo())
+    yield writer.writerow(("name", "measurement_unit", "amount"))
+    for row in data:
+        yield writer.writerow(row)
+
+
+def json_rows(data):
+    separator = "["
+    for name, measurement_unit, amount in data:
+        yield separator + json.dumps(
+            {
+                "name": name,
+                "measurement_unit": measurement_unit,
+                "amount": amount,
+            },
+            ensure_ascii=False,
+        )
+        separator = ",\n"
+    yield "[]" if separator == "[" else "]"
+
 
-    file_buffer.seek(0)
-    file = file_buffer.read()
-    header = {"Content-Disposition": 'attachment; filename="foodgram.txt"'}
+FILE_WRITERS = {
+    "txt": txt_rows,
+    "csv": csv_rows,
+    "json": json_rows,
+}
+
+
+def shopping_list(user):
+    """Суммарное количество ингредиентов из корзины пользователя."""
+    return RecipeIngredient.objects.filter(
+        recipe__shopping_buckets__user=user
+    ).values_list(
+        "ingredient__name",
+        "ingredient__measurement_unit",
+    ).annotate(
+        total_amount=Sum("amount")
+    ).order_by(
+        "ingredient__name", "ingredient__measurement_unit"
+    )
+
+
+def write_to_file(
+    data, file_format="txt", response_class=StreamingHttpResponse
+):
+    """
+    Отдаёт список покупок потоком, не собирая файл в памяти.
+
+    data — итератор кортежей (название, единица измерения, количество).
+    Асинхронное представление передаёт AsyncStreamingHttpResponse.
+    """
+    if file_format not in SHOPPING_LIST_FORMATS:
+        return Response(
+            {
+                "format": "Допустимые форматы: "
+                + ", ".join(SHOPPING_LIST_FORMATS)
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    content_type = SHOPPING_LIST_FORMATS[file_format]
+    filename = f"{SHOPPING_LIST_FILENAME}.{file_format}"
+    header = {"Content-Disposition": f'attachment; filename="{filename}"'}
 
-    return HttpResponse(
-        file, content_type="text/plain", headers=header
+    return response_class(
+        FILE_WRITERS[file_format](data),
+        content_type=f"{content_type}; charset=utf-8",
+        headers=header,
     )
 
 
@@ -49,3 +127,91 @@ def call_serializer(serializer, request, recipe_id):
         return Response(status=status.HTTP_204_NO_CONTENT)
     except Exception as ex:
         return Response(str(ex), status=status.HTTP_400_BAD_REQUEST)
+
+
+def call_batch(model, request, serializer):
+    """
+    Добавляет в список model или удаляет из него сразу много рецептов.
+
+    Одна вставка или одно удаление на весь список и по статусу на
+    каждый рецепт. bulk_create не отправляет сигналы, поэтому после
+    вставки счётчики затронутых рецептов пересчитываются явно. Удаление
+    идёт обычным delete(): пачка ограничена BATCH_MAX_SIZE, а сигналы
+    сами уменьшают счётчики.
+    """
+    serializer = serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    pks = list(dict.fromkeys(serializer.validated_data["recipes"]))
+    user = request.user
+    found = set(
+        Recipe.objects.filter(pk__in=pks)
+        .order_by()
+        .values_list("pk", flat=True)
+    )
+    current = set(
+        model.objects.filter(user=user, recipe_id__in=pks)
+        .order_by()
+        .values_list("recipe_id", flat=True)
+    )
+    if request.method == "POST":
+        changed = [pk for pk in pks if pk in found and pk not in current]
+        unchanged_status, changed_status = BATCH_EXISTS, BATCH_CREATED
+    else:
+        changed = [pk for pk in pks if pk in current]
+        unchanged_status, changed_status = BATCH_ABSENT, BATCH_DELETED
+    with transaction.atomic():
+        if request.method == "POST":
+            model.objects.bulk_create(
+                (model(user=user, recipe_id=pk) for pk in changed),
+                ignore_conflicts=True,
+            )
+            refresh_counters(model, changed)
+        elif changed:
+            model.objects.filter(user=user, recipe_id__in=changed).delete()
+    changed = set(changed)
+    results = [
+        {
+            "id": pk,
+            "status": (
+                BATCH_NOT_FOUND if pk not in found
+                else changed_status if pk in changed
+                else unchanged_status
+            ),
+        }
+        for pk in pks
+    ]
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+def recipe_feed_cache_key(request):
+    """
+    Ключ кэша страницы ленты рецептов для анонимного пользователя.
+
+    Для анонима ответ зависит только от тегов, режима их сопоставления,
+    автора и параметров пагинации, поэтому остальные параметры в ключ
+    не входят, а теги сортируются. Версия меняется сигналами при
+    изменении данных.
+    """
+    params = request.query_params
+    normalized = (
+        request.get_host(),
+        tuple(sorted(set(params.getlist("tags")))),
+        params.get("tags_match"),
+        params.get("author"),
+        params.get("page"),
+        params.get("limit"),
+        params.get("pagination"),
+        params.get("cursor"),
+        params.get("count"),
+    )
+    digest = hashlib.md5(repr(normalized).encode()).hexdigest()
+    return f"recipe_feed:{get_version(RECIPE_FEED_VERSION_KEY)}:{digest}"
+
+
+def get_recipes_limit(request):
+    """Разбирает параметр recipes_limit; None — без ограничения."""
+    try:
+        limit = int(request.query_params.get("recipes_limit"))
+    except (TypeError, ValueError):
+        return None
+    return max(limit, 0)
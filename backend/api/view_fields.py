@@ -1,18 +1,126 @@
 import base64
-from django.core.files.base import ContentFile
-from rest_framework import serializers
+import binascii
+from django.core.files import File
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from tempfile import SpooledTemporaryFile
+
+from recipes.constants import (
+    BASE64_CHUNK_SIZE,
+    IMAGE_MIME_TYPES,
+    IMAGE_SPOOL_MAX_SIZE,
+    MAX_IMAGE_PIXELS,
+    MAX_IMAGE_SIZE,
+)
+from recipes.images import rendition_urls
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = (
+        f"Размер изображения превышает {MAX_IMAGE_SIZE // (1024 * 1024)} МБ."
+    )
+    default_code = "image_too_large"
 
 
 class Base64ImageField(serializers.ImageField):
     """
-    Кастомное поле для обработки изображений в формате Base64
+    Кастомное поле для обработки изображений в формате Base64.
+
+    Размер и тип проверяются до декодирования, данные декодируются
+    частями во временный файл, а Pillow читает только заголовок.
     """
 
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith("data:image"):
-            header, image_data = data.split(";base64,")
-            extension = header.split("/")[-1]
-            decoded_file = base64.b64decode(image_data)
-            file = ContentFile(decoded_file, name=f"avatar.{extension}")
-            return super().to_internal_value(file)
-        raise serializers.ValidationError("Недопустимый формат изображения.")
+        if not isinstance(data, str) or not data.startswith("data:"):
+            raise serializers.ValidationError(
+                "Недопустимый формат изображения."
+            )
+        separator = data.find(";base64,", 0, 64)
+        mime_type = data[len("data:"):separator]
+        if separator == -1 or mime_type not in IMAGE_MIME_TYPES:
+            raise serializers.ValidationError(
+                "Недопустимый формат изображения."
+            )
+        start = separator + len(";base64,")
+        if (len(data) - start) // 4 * 3 > MAX_IMAGE_SIZE:
+            raise ImageTooLarge()
+        extension, image_format = IMAGE_MIME_TYPES[mime_type]
+        file = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_SIZE)
+        try:
+            for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    data[offset:offset + BASE64_CHUNK_SIZE], validate=True
+                ))
+            file.seek(0)
+            with Image.open(file) as image:
+                width, height = image.size
+                actual_format = image.format
+        except (binascii.Error, OSError, Image.DecompressionBombError):
+            file.close()
+            raise serializers.ValidationError(
+                "Загруженный файл не является корректным изображением."
+            )
+        if actual_format != image_format:
+            file.close()
+            raise serializers.ValidationError(
+                "Тип изображения не совпадает с заявленным."
+            )
+        if width * height > MAX_IMAGE_PIXELS:
+            file.close()
+            raise ImageTooLarge("Слишком большое разрешение изображения.")
+        file.seek(0)
+        return serializers.FileField.to_internal_value(
+            self, File(file, name=f"image.{extension}")
+        )
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """
+    URL уменьшенных копий изображения из поля image_field, созданных
+    в фоне. Готовность берётся из поля <image_field>_renditions_for.
+    """
+
+    def __init__(self, renditions, image_field, **kwargs):
+        self.renditions = renditions
+        self.image_field = image_field
+        super().__init__(source="*", **kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = rendition_urls(
+            getattr(value, self.image_field),
+            self.renditions,
+            getattr(value, f"{self.image_field}_renditions_for"),
+        )
+        return {
+            rendition: request.build_absolute_uri(url) if request else url
+            for rendition, url in urls.items()
+        }
+
+
+class PrimaryKeyListField(serializers.ListField):
+    """Список первичных ключей, проверяемый одним запросом."""
+
+    child = serializers.IntegerField()
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pks = super().to_internal_value(data)
+        found = set(
+            self.queryset.filter(pk__in=pks).values_list("pk", flat=True)
+        )
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                "Недопустимые первичные ключи: "
+                + ", ".join(map(str, missing))
+            )
+        return pks
+
+    def to_representation(self, value):
+        return [obj.pk for obj in value.all()]
@@ -0,0 +1,77 @@
+from recipes.models import FavouriteRecipe, Follow, ShoppingBusket
+
+
+class ViewerState:
+    """
+    Подписки, избранное и корзина текущего пользователя в рамках запроса.
+
+    Загружаются одним запросом на каждый вид и только для переданных id,
+    после чего флаги проверяются по множествам. Число подписчиков автора
+    или добавлений рецепта на стоимость не влияет.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.authors = set()
+        self.recipes = set()
+        self.following = set()
+        self.favorites = set()
+        self.cart = set()
+
+    def load_authors(self, author_ids):
+        missing = set(author_ids) - self.authors
+        if not missing or not self.user.is_authenticated:
+            return
+        self.authors |= missing
+        self.following.update(
+            Follow.objects.filter(
+                user=self.user, author__in=missing
+            ).values_list("author_id", flat=True)
+        )
+
+    def load_recipes(self, recipe_ids):
+        missing = set(recipe_ids) - self.recipes
+        if not missing or not self.user.is_authenticated:
+            return
+        self.recipes |= missing
+        for model, ids in (
+            (FavouriteRecipe, self.favorites),
+            (ShoppingBusket, self.cart),
+        ):
+            ids.update(
+                model.objects.filter(
+                    user=self.user, recipe__in=missing
+                ).values_list("recipe_id", flat=True)
+            )
+
+    def remember_author(self, author_id, subscribed):
+        self.authors.add(author_id)
+        if subscribed:
+            self.following.add(author_id)
+
+    def remember_recipe(self, recipe_id, favorited, in_shopping_cart):
+        self.recipes.add(recipe_id)
+        if favorited:
+            self.favorites.add(recipe_id)
+        if in_shopping_cart:
+            self.cart.add(recipe_id)
+
+    def is_subscribed(self, author_id):
+        self.load_authors([author_id])
+        return author_id in self.following
+
+    def is_favorited(self, recipe_id):
+        self.load_recipes([recipe_id])
+        return recipe_id in self.favorites
+
+    def is_in_shopping_cart(self, recipe_id):
+        self.load_recipes([recipe_id])
+        return recipe_id in self.cart
+
+
+def get_viewer_state(request):
+    """ViewerState запроса, создаётся при первом обращении."""
+    state = getattr(request, "viewer_state", None)
+    if state is None:
+        state = request.viewer_state = ViewerState(request.user)
+    return state
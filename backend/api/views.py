@@ -1,38 +1,71 @@
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as djoser_user
-from pyshorteners import Shortener
+from foodgram_backend.routers import read_from_primary
+from functools import partial
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import (
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
+from api.conditional import conditional_get, make_etag, queryset_validators
 from api.filters import IngredientFilterSet, RecipeFilterSet
-from api.pagination import FoodgramPagination
+from api.negotiation import IgnoreFormatContentNegotiation
+from api.pagination import FoodgramCursorPagination, FoodgramPagination
 from api.permissions import IsOwner
 from api.serializers import (
+    RECIPE_INGREDIENTS_PREFETCH,
     FavouriteRecipeSerializer,
     FollowSerializer,
     IngredientSerializer,
+    RecipeBatchSerializer,
     RecipeSerializer,
     ShoppingBusketSerializer,
     TagSerializer,
     UserAvatarSerializer,
     UserSerializer,
 )
-from api.utils import call_serializer, write_to_file
+from api.utils import (
+    call_batch,
+    call_serializer,
+    get_recipes_limit,
+    recipe_feed_cache_key,
+    shopping_list,
+    write_to_file,
+)
+from api.viewer_state import get_viewer_state
+from recipes.constants import (
+    HTTP_CACHE_MAX_AGE,
+    INGREDIENT_AUTOCOMPLETE_LIMIT,
+    INGREDIENT_AUTOCOMPLETE_MAX_LIMIT,
+    NDJSON_CONTENT_TYPE,
+    RECIPE_FEED_CACHE_TIMEOUT,
+    RECIPE_FRONTEND_URL,
+    SHOPPING_LIST_CHUNK_SIZE,
+    SHORT_LINK_CACHE_TIMEOUT,
+)
+from recipes.feed import following_feed
+from recipes.ingredient_index import IngredientIndex, ingredient_index
 from recipes.models import (
+    FavouriteRecipe,
     Follow,
     Ingredient,
     Recipe,
     ShoppingBusket,
+    ShortLink,
     Tag,
     User,
 )
+from recipes.transfer import RecipeImporter, export_rows, ndjson_lines
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -44,17 +77,146 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     pagination_class = FoodgramPagination
     permission_classes = (IsOwner, IsAuthenticatedOrReadOnly)
+    lookup_value_regex = r"\d+"
+
+    def get_queryset(self):
+        """
+        Набор рецептов с заранее загруженными связями.
+
+        Число SQL-запросов на страницу не зависит от её размера:
+        теги и ингредиенты с количеством подгружаются отдельными
+        запросами, а флаги текущего пользователя берутся из ViewerState.
+        """
+        return Recipe.objects.select_related("author").prefetch_related(
+            "tags", RECIPE_INGREDIENTS_PREFETCH
+        )
+
+    def get_user_flags(self):
+        user = self.request.user
+        return {
+            "favorited": Exists(
+                FavouriteRecipe.objects.filter(
+                    user=user, recipe=OuterRef("pk")
+                )
+            ),
+            "in_shopping_cart": Exists(
+                ShoppingBusket.objects.filter(
+                    user=user, recipe=OuterRef("pk")
+                )
+            ),
+        }
+
+    def list(self, request, *args, **kwargs):
+        """Лента рецептов; для анонимов страницы берутся из кэша."""
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = recipe_feed_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            # Отстающая реплика не должна попасть в кэш на весь его срок.
+            with read_from_primary():
+                data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, RECIPE_FEED_CACHE_TIMEOUT)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Рецепт с поддержкой условного GET.
+
+        ETag считается одним лёгким запросом по датам изменения рецепта,
+        его тегов и ингредиентов, данным автора и флагам текущего
+        пользователя, поэтому при 304 рецепт не загружается и не
+        сериализуется. Флаги из этого запроса сохраняются в ViewerState
+        и повторно не запрашиваются.
+        """
+        user = request.user
+        fields = [
+            "id",
+            "updated_at",
+            "author_id",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+            "author__email",
+            "author__avatar",
+            "author__avatar_renditions_for",
+            "tags_updated_at",
+            "ingredients_updated_at",
+        ]
+        state = Recipe.objects.filter(pk=kwargs[self.lookup_field]).annotate(
+            tags_updated_at=Subquery(
+                Tag.objects.filter(recipes=OuterRef("pk"))
+                .order_by("-updated_at")
+                .values("updated_at")[:1]
+            ),
+            ingredients_updated_at=Subquery(
+                Ingredient.objects.filter(recipes=OuterRef("pk"))
+                .order_by("-updated_at")
+                .values("updated_at")[:1]
+            ),
+        )
+        if user.is_authenticated:
+            state = state.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(
+                        user=user, author=OuterRef("author")
+                    )
+                ),
+                **self.get_user_flags(),
+            )
+            fields += ["is_subscribed", "favorited", "in_shopping_cart"]
+        state = state.values_list(*fields).first()
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+        if user.is_authenticated:
+            recipe_id, author_id = state[0], state[2]
+            subscribed, favorited, in_shopping_cart = state[-3:]
+            viewer_state = get_viewer_state(request)
+            viewer_state.remember_author(author_id, subscribed)
+            viewer_state.remember_recipe(
+                recipe_id, favorited, in_shopping_cart
+            )
+        scope = "private" if user.is_authenticated else "public"
+        return conditional_get(
+            request,
+            make_etag(user.pk, *state),
+            max(filter(None, (state[1], *state[9:11]))),
+            partial(super().retrieve, request, *args, **kwargs),
+            vary=("Authorization",),
+            no_cache=True,
+            **{scope: True},
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     @action(detail=True, url_path="get-link")
     def get_short_link(self, request, pk=None):
-        detail_url = reverse("recipes-detail", args=[pk], request=request)
-        full_url = request.build_absolute_uri(detail_url)
-        shortener = Shortener()
-        shortened_url = shortener.tinyurl.short(full_url)
-        return Response({"short-link": shortened_url})
+        recipe = get_object_or_404(Recipe.objects.only("id"), pk=pk)
+        short_link = ShortLink.objects.get_for_recipe(recipe.id)
+        short_url = reverse(
+            "short-link", args=[short_link.code], request=request
+        )
+        return Response({"short-link": short_url})
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="feed",
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        """
+        Рецепты авторов, на которых подписан пользователь.
+
+        Курсорная пагинация от новых к старым. Для пользователей с
+        материализованной лентой рецепты берутся из FeedEntry.
+        """
+        queryset = following_feed(self.get_queryset(), request.user)
+        paginator = FoodgramCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(
         detail=True,
@@ -70,17 +232,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
         methods=["GET"],
         url_path="download_shopping_cart",
         permission_classes=(IsAuthenticated,),
+        content_negotiation_class=IgnoreFormatContentNegotiation,
     )
     def download_shopping_list(self, request):
-        shopping_buskets = ShoppingBusket.objects.filter(
-            user=self.request.user
-        ).select_related("recipe").values_list(
-            'recipe__recipe_ingredients__ingredient__name',
-            'recipe__recipe_ingredients__amount'
+        ingredients = shopping_list(request.user)
+        return write_to_file(
+            data=ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE),
+            file_format=request.query_params.get("format", "txt"),
         )
 
-        return write_to_file(data=shopping_buskets)
-
     @action(
         detail=True,
         methods=["POST", "DELETE"],
@@ -90,6 +250,61 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def favorite(self, request, pk=None):
         return call_serializer(FavouriteRecipeSerializer, request, pk)
 
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        url_path="shopping_cart",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_batch(self, request):
+        return call_batch(ShoppingBusket, request, RecipeBatchSerializer)
+
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        url_path="favorite",
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_batch(self, request):
+        return call_batch(FavouriteRecipe, request, RecipeBatchSerializer)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        permission_classes=(IsAdminUser,),
+        content_negotiation_class=IgnoreFormatContentNegotiation,
+    )
+    def export_recipes(self, request):
+        """Выгрузка рецептов (с фильтрами списка) потоком NDJSON."""
+        queryset = self.filter_queryset(Recipe.objects.all())
+        return StreamingHttpResponse(
+            ndjson_lines(export_rows(queryset)),
+            content_type=f"{NDJSON_CONTENT_TYPE}; charset=utf-8",
+        )
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="import",
+        permission_classes=(IsAdminUser,),
+    )
+    def import_recipes(self, request):
+        """
+        Загрузка рецептов из тела запроса в NDJSON.
+
+        Тело читается построчно, не целиком. Изображения указываются
+        именами файлов, уже лежащих в хранилище.
+        """
+        if request.content_type.split(";")[0] != NDJSON_CONTENT_TYPE:
+            return Response(
+                {"detail": f"Ожидается {NDJSON_CONTENT_TYPE}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        importer = RecipeImporter()
+        stats = importer.run(request.stream or ())
+        return Response({**stats, "error_lines": importer.errors})
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет для модели Tags."""
@@ -97,6 +312,17 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = queryset_validators(self.get_queryset())
+        return conditional_get(
+            request,
+            etag,
+            last_modified,
+            partial(super().list, request, *args, **kwargs),
+            public=True,
+            max_age=HTTP_CACHE_MAX_AGE,
+        )
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет для модели Ingredients."""
@@ -106,6 +332,43 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilterSet
 
+    def list(self, request, *args, **kwargs):
+        """
+        Список ингредиентов с поддержкой условного GET.
+
+        ETag — версия индекса ингредиентов, которую сигналы меняют
+        при любом изменении справочника, поэтому проверка актуальности
+        не требует запроса к базе.
+        """
+        return conditional_get(
+            request,
+            make_etag(IngredientIndex.current_version()),
+            None,
+            partial(self.get_list_response, request, *args, **kwargs),
+            public=True,
+            max_age=HTTP_CACHE_MAX_AGE,
+        )
+
+    def get_list_response(self, request, *args, **kwargs):
+        name = request.query_params.get("name")
+        if name and settings.INGREDIENT_INDEX_ENABLED:
+            return Response(ingredient_index.startswith(name))
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=["GET"], url_path="autocomplete")
+    def autocomplete(self, request):
+        name = request.query_params.get("name", "").strip()
+        if not name:
+            return Response([])
+        try:
+            limit = int(request.query_params.get("limit"))
+        except (TypeError, ValueError):
+            limit = INGREDIENT_AUTOCOMPLETE_LIMIT
+        limit = max(1, min(limit, INGREDIENT_AUTOCOMPLETE_MAX_LIMIT))
+        ingredients = Ingredient.objects.autocomplete(name, limit)
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
 
 class UserViewSet(djoser_user):
     """Вьюсет для модели User."""
@@ -138,7 +401,8 @@ class UserViewSet(djoser_user):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         try:
-            user.avatar.delete(save=True)
+            user.avatar = None
+            user.save(update_fields=["avatar"])
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as ex:
             return Response(str(ex), status=status.HTTP_400_BAD_REQUEST)
@@ -150,7 +414,37 @@ class UserViewSet(djoser_user):
         permission_classes=(IsAuthenticated,),
     )
     def get_all_subscriptions(self, request):
-        following = request.user.following.all()
+        """
+        Подписки текущего пользователя.
+
+        Последние recipes_limit рецептов авторов подгружаются одним
+        запросом на всю страницу: рецепты отбираются коррелированным
+        подзапросом с LIMIT по каждому автору.
+        """
+        limit = get_recipes_limit(request)
+        recipes = Recipe.objects.only(
+            "id",
+            "name",
+            "image",
+            "image_renditions_for",
+            "cooking_time",
+            "author_id",
+        )
+        if limit is not None:
+            recipes = recipes.filter(
+                pk__in=Subquery(
+                    Recipe.objects.filter(
+                        author=OuterRef("author")
+                    ).values("pk")[:limit]
+                )
+            )
+        following = request.user.following.select_related(
+            "author"
+        ).order_by("-id").prefetch_related(
+            Prefetch(
+                "author__recipes", queryset=recipes, to_attr="limited_recipes"
+            ),
+        )
         page = self.paginate_queryset(following)
 
         serializer = FollowSerializer(
@@ -185,3 +479,15 @@ class UserViewSet(djoser_user):
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as ex:
             return Response(str(ex), status=status.HTTP_400_BAD_REQUEST)
+
+
+def short_link_redirect(request, code):
+    """Перенаправляет короткую ссылку на страницу рецепта."""
+    key = f"short_link:{code}"
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        recipe_id = get_object_or_404(
+            ShortLink.objects.values_list("recipe_id", flat=True), code=code
+        )
+        cache.set(key, recipe_id, SHORT_LINK_CACHE_TIMEOUT)
+    return redirect(RECIPE_FRONTEND_URL.format(recipe_id))
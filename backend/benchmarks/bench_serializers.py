@@ -0,0 +1,74 @@
+"""
+Микробенчмарки сериализации: лента рецептов, подписки, список покупок.
+
+Бюджеты запросов совпадают с числом запросов соответствующих
+эндпоинтов за вычетом пагинации и аутентификации.
+"""
+import pytest
+from django.db.models import Prefetch
+
+from api.serializers import FollowSerializer, RecipeSerializer
+from api.utils import shopping_list, write_to_file
+from api.views import RecipeViewSet
+from recipes.constants import SHOPPING_LIST_FORMATS
+from recipes.models import Follow, Recipe, ShoppingBusket
+
+
+PAGE_SIZE = 20
+
+
+def bench_recipe_serializer(measure, api_request):
+    def serialize():
+        page = RecipeViewSet().get_queryset()[:PAGE_SIZE]
+        return RecipeSerializer(
+            page, many=True, context={"request": api_request}
+        ).data
+
+    data = measure(serialize, max_queries=6)
+    assert len(data) == PAGE_SIZE
+
+
+def bench_follow_serializer(measure, api_request, viewer):
+    def serialize():
+        page = (
+            Follow.objects.filter(user=viewer)
+            .select_related("author")
+            .order_by("-id")
+            .prefetch_related(
+                Prefetch(
+                    "author__recipes",
+                    queryset=Recipe.objects.only(
+                        "id",
+                        "name",
+                        "image",
+                        "image_renditions_for",
+                        "cooking_time",
+                        "author_id",
+                    ),
+                    to_attr="limited_recipes",
+                )
+            )[:PAGE_SIZE]
+        )
+        return FollowSerializer(
+            page, many=True, context={"request": api_request}
+        ).data
+
+    data = measure(serialize, max_queries=3)
+    assert data
+
+
+@pytest.mark.parametrize("file_format", SHOPPING_LIST_FORMATS)
+def bench_write_to_file(measure, viewer, file_format):
+    ShoppingBusket.objects.bulk_create(
+        [
+            ShoppingBusket(user=viewer, recipe=recipe)
+            for recipe in Recipe.objects.all()[:50]
+        ],
+        ignore_conflicts=True,
+    )
+
+    def download():
+        response = write_to_file(shopping_list(viewer), file_format)
+        return b"".join(response.streaming_content)
+
+    assert measure(download, max_queries=1)
@@ -0,0 +1,80 @@
+"""
+Общие фикстуры микробенчмарков (pytest-benchmark).
+
+    cd backend
+    pytest benchmarks --benchmark-json=benchmark.json
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+Данные масштаба BENCHMARK_SCALE (по умолчанию tiny) создаются один раз
+на сессию в тестовой базе. Для каждого замера в extra_info попадают
+число SQL-запросов и перцентили p50/p95/p99, а тест падает, если
+запросов стало больше бюджета.
+"""
+import os
+
+import pytest
+import statistics
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from synthetic import populate
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        populate(
+            os.getenv("BENCHMARK_SCALE", "tiny"), progress=lambda line: None
+        )
+
+
+@pytest.fixture
+def viewer(db):
+    """Пользователь с наибольшим числом подписок."""
+    from recipes.models import User
+
+    return User.objects.order_by("-following_count").first()
+
+
+@pytest.fixture
+def api_request(viewer):
+    """Запрос DRF от viewer, как его видят сериализаторы."""
+    request = Request(APIRequestFactory().get("/api/recipes/"))
+    request.user = viewer
+    return request
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        return {"p50": timings[0], "p95": timings[0], "p99": timings[0]}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Замеряет function() и проверяет бюджет запросов max_queries.
+
+    Запросы считаются на отдельном прогоне, чтобы не влиять на время.
+    """
+
+    def run(function, max_queries):
+        with CaptureQueriesContext(connection) as queries:
+            function()
+        result = benchmark(function)
+        stats = benchmark.stats.stats
+        benchmark.extra_info["queries"] = len(queries)
+        benchmark.extra_info.update(
+            {
+                name: round(value * 1000, 3)
+                for name, value in percentiles(stats.data).items()
+            }
+        )
+        assert len(queries) <= max_queries, [
+            query["sql"] for query in queries.captured_queries
+        ]
+        return result
+
+    return run
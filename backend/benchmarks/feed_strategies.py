@@ -0,0 +1,146 @@
+"""
+Сравнение стратегий ленты подписок: чтение по подпискам и FeedEntry.
+
+Создаёт временную тестовую базу (PostgreSQL при ENVIRONMENT=production),
+заполняет её авторами и рецептами и для пользователей с разным числом
+подписок измеряет первую страницу ленты обеими стратегиями, а также
+стоимость раскладки одного рецепта по материализованным лентам.
+Точка, где материализованная лента становится быстрее, подсказывает
+значение FEED_MATERIALIZE_THRESHOLD.
+
+    python benchmarks/feed_strategies.py --authors 5000 --follows 10 100 1000
+"""
+import os
+
+import argparse
+import statistics
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram_backend.settings")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--authors", type=int, default=5000)
+    parser.add_argument("--recipes-per-author", type=int, default=5)
+    parser.add_argument(
+        "--follows", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument("--fan-out-followers", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args()
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def populate(args):
+    from recipes.models import Recipe, User
+
+    User.objects.bulk_create(
+        User(
+            username=f"author{number}",
+            email=f"author{number}@example.com",
+            first_name="Автор",
+            last_name=str(number),
+        )
+        for number in range(args.authors)
+    )
+    author_ids = list(User.objects.values_list("pk", flat=True))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=author_id,
+                name=f"Рецепт {number}",
+                text="Текст",
+                cooking_time=10,
+            )
+            for author_id in author_ids
+            for number in range(args.recipes_per_author)
+        ),
+        batch_size=1000,
+    )
+    return author_ids
+
+
+def create_reader(name, author_ids):
+    from recipes.models import Follow, User
+
+    reader = User.objects.create(
+        username=name,
+        email=f"{name}@example.com",
+        following_count=len(author_ids),
+    )
+    Follow.objects.bulk_create(
+        (Follow(user=reader, author_id=pk) for pk in author_ids),
+        batch_size=1000,
+    )
+    return reader
+
+
+def main(args):
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+
+    from recipes import feed
+    from recipes.models import Recipe
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        author_ids = populate(args)
+        print(
+            f"{connection.vendor}: {len(author_ids)} авторов, "
+            f"{Recipe.objects.count()} рецептов, страница {args.limit}"
+        )
+        print(f"{'подписок':>10} {'чтение, мс':>12} {'FeedEntry, мс':>14}")
+        for follows in args.follows:
+            reader = create_reader(f"reader{follows}", author_ids[:follows])
+            feed.backfill(reader.pk, author_ids[:follows])
+            timings = [
+                measure(
+                    lambda: list(
+                        feed.following_feed(
+                            Recipe.objects.all(), reader, materialized
+                        ).values_list("pk", flat=True)[:args.limit]
+                    ),
+                    args.repeat,
+                )
+                for materialized in (False, True)
+            ]
+            print(f"{follows:>10} {timings[0]:>12.2f} {timings[1]:>14.2f}")
+
+        settings.FEED_MATERIALIZE_THRESHOLD = 1
+        author = author_ids[0]
+        for number in range(args.fan_out_followers):
+            create_reader(f"follower{number}", [author])
+        # bulk_create не отправляет post_save, раскладку запускаем сами.
+        Recipe.objects.bulk_create([
+            Recipe(
+                author_id=author, name="Новый", text="Текст", cooking_time=1
+            )
+        ])
+        recipe = Recipe.objects.latest("pk")
+        fan_out = measure(lambda: feed.fan_out(recipe), 1)
+        print(
+            f"Раскладка рецепта по {args.fan_out_followers} лентам: "
+            f"{fan_out:.2f} мс"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,172 @@
+"""
+Нагрузочный сценарий API: лента, фильтры, автодополнение, подписки и
+скачивание списка покупок.
+
+База заполняется benchmarks/synthetic.py, сервер запускается с
+QUERY_COUNT_HEADER=true, чтобы ответы несли X-DB-Queries:
+
+    python benchmarks/synthetic.py --scale small
+    QUERY_COUNT_HEADER=true gunicorn --workers 4 --bind 127.0.0.1:8000
+    locust -f benchmarks/locustfile.py --headless -u 50 -r 10 -t 2m \\
+        --host http://127.0.0.1:8000 --csv results/load
+
+Locust сохраняет p50/p95/p99 по каждому эндпоинту в results/load_stats.csv,
+а по завершении сценарий выводит таблицу перцентилей и число SQL-запросов
+(медиана и максимум) и пишет её в results/load_queries.csv, если задан
+--csv. Пользователи берутся случайно из user0..user<USERS-1>
+(переменная окружения LOAD_USERS, по умолчанию 1000).
+"""
+import os
+
+import csv
+import random
+import statistics
+from locust import HttpUser, between, events, task
+from synthetic import SYNTHETIC_PASSWORD
+
+
+USERS = int(os.getenv("LOAD_USERS", 1000))
+TAGS = ("Bakery", "Snack", "Soup", "Fish", "Meat")
+INGREDIENT_PREFIXES = ("а", "бу", "мол", "сыр", "кар", "я", "со", "ri")
+PAGE_LIMIT = 6
+
+query_counts = {}
+
+
+@events.request.add_listener
+def record_queries(name, response, exception, **kwargs):
+    if exception or response is None:
+        return
+    count = response.headers.get("X-DB-Queries")
+    if count is not None:
+        query_counts.setdefault(name, []).append(int(count))
+
+
+@events.quitting.add_listener
+def report(environment, **kwargs):
+    rows = []
+    for name, counts in sorted(query_counts.items()):
+        entry = environment.stats.get(name, "GET")
+        if not entry.num_requests:
+            entry = environment.stats.get(name, "POST")
+        rows.append(
+            (
+                name,
+                entry.num_requests,
+                entry.get_response_time_percentile(0.5),
+                entry.get_response_time_percentile(0.95),
+                entry.get_response_time_percentile(0.99),
+                statistics.median(counts),
+                max(counts),
+            )
+        )
+    header = ("name", "requests", "p50", "p95", "p99", "queries", "max")
+    print("{:<32} {:>8} {:>6} {:>6} {:>6} {:>7} {:>5}".format(*header))
+    for row in rows:
+        print("{:<32} {:>8} {:>6} {:>6} {:>6} {:>7} {:>5}".format(*row))
+    options = environment.parsed_options
+    if options and options.csv_prefix:
+        path = f"{options.csv_prefix}_queries.csv"
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+class AnonymousVisitor(HttpUser):
+    """Гость листает ленту и фильтрует по тегам."""
+
+    weight = 1
+    wait_time = between(1, 3)
+
+    @task(3)
+    def recipes(self):
+        self.client.get(
+            f"/api/recipes/?limit={PAGE_LIMIT}&page={random.randint(1, 5)}",
+            name="/api/recipes/ [anonymous]",
+        )
+
+    @task(1)
+    def recipes_by_tag(self):
+        self.client.get(
+            f"/api/recipes/?limit={PAGE_LIMIT}&tags={random.choice(TAGS)}",
+            name="/api/recipes/?tags [anonymous]",
+        )
+
+
+class SignedInUser(HttpUser):
+    """Пользователь с токеном: лента подписок, фильтры, корзина."""
+
+    weight = 3
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.recipe_ids = []
+        number = random.randrange(USERS)
+        response = self.client.post(
+            "/api/auth/token/login/",
+            json={
+                "email": f"user{number}@example.com",
+                "password": SYNTHETIC_PASSWORD,
+            },
+            name="/api/auth/token/login/",
+        )
+        token = response.json()["auth_token"]
+        self.client.headers["Authorization"] = f"Token {token}"
+
+    @task(4)
+    def recipes(self):
+        response = self.client.get(
+            f"/api/recipes/?limit={PAGE_LIMIT}&page={random.randint(1, 5)}",
+            name="/api/recipes/",
+        )
+        if response.ok:
+            self.recipe_ids = [
+                recipe["id"] for recipe in response.json()["results"]
+            ]
+
+    @task(2)
+    def following_feed(self):
+        self.client.get(
+            f"/api/recipes/feed/?limit={PAGE_LIMIT}", name="/api/recipes/feed/"
+        )
+
+    @task(2)
+    def filters(self):
+        tags = "&".join(
+            f"tags={tag}" for tag in random.sample(TAGS, 2)
+        )
+        flag = random.choice(("is_favorited", "is_in_shopping_cart"))
+        self.client.get(
+            f"/api/recipes/?limit={PAGE_LIMIT}&{tags}&{flag}=1",
+            name="/api/recipes/?tags&flags",
+        )
+
+    @task(3)
+    def autocomplete(self):
+        self.client.get(
+            f"/api/ingredients/?name={random.choice(INGREDIENT_PREFIXES)}",
+            name="/api/ingredients/?name",
+        )
+
+    @task(1)
+    def subscriptions(self):
+        self.client.get(
+            "/api/users/subscriptions/?limit=6&recipes_limit=3",
+            name="/api/users/subscriptions/",
+        )
+
+    @task(1)
+    def recipe_detail(self):
+        if self.recipe_ids:
+            self.client.get(
+                f"/api/recipes/{random.choice(self.recipe_ids)}/",
+                name="/api/recipes/<id>/",
+            )
+
+    @task(1)
+    def download_shopping_cart(self):
+        self.client.get(
+            "/api/recipes/download_shopping_cart/",
+            name="/api/recipes/download_shopping_cart/",
+        )
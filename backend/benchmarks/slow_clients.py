@@ -0,0 +1,123 @@
+"""
+Пропускная способность одного воркера под нагрузкой медленных клиентов.
+
+Медленные клиенты держат соединения открытыми, отправляя тело загрузки
+аватара по нескольку байт, а быстрые клиенты параллельно запрашивают
+лёгкий эндпоинт. Скрипт выводит число ответов в секунду и задержки
+быстрых запросов. Запускается против каждого режима по очереди:
+
+    gunicorn --workers 1 --bind 127.0.0.1:8000
+    ASGI_ENABLED=true gunicorn --workers 1 --bind 127.0.0.1:8000
+
+    python benchmarks/slow_clients.py --token <token>
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/tags/")
+    parser.add_argument("--token", help="Токен для загрузки аватара")
+    parser.add_argument("--slow", type=int, default=20)
+    parser.add_argument("--fast", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--body-size", type=int, default=64 * 1024)
+    parser.add_argument("--byte-delay", type=float, default=0.05)
+    return parser.parse_args()
+
+
+async def slow_client(host, port, args, deadline):
+    body_size = args.body_size
+    headers = (
+        "PUT /api/users/me/avatar/ HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {body_size}\r\n"
+    )
+    if args.token:
+        headers += f"Authorization: Token {args.token}\r\n"
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(args.byte_delay)
+            continue
+        writer.write((headers + "\r\n").encode())
+        sent = 0
+        try:
+            while sent < body_size and time.monotonic() < deadline:
+                writer.write(b" ")
+                await writer.drain()
+                sent += 1
+                await asyncio.sleep(args.byte_delay)
+        except OSError:
+            pass
+        writer.close()
+
+
+async def fast_client(host, port, path, deadline, latencies, errors):
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n"
+    ).encode()
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                deadline - started,
+            )
+            writer.write(request)
+            await writer.drain()
+            status_line = await asyncio.wait_for(
+                reader.readline(), deadline - time.monotonic()
+            )
+            await reader.read()
+            writer.close()
+        except (OSError, asyncio.TimeoutError, ValueError):
+            if time.monotonic() < deadline:
+                errors.append(1)
+            continue
+        if b" 200 " in status_line:
+            latencies.append(time.monotonic() - started)
+        else:
+            errors.append(1)
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100)[percent - 1] * 1000
+
+
+async def main(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    deadline = time.monotonic() + args.duration
+    latencies, errors = [], []
+    await asyncio.gather(
+        *(
+            slow_client(host, port, args, deadline)
+            for _ in range(args.slow)
+        ),
+        *(
+            fast_client(host, port, args.path, deadline, latencies, errors)
+            for _ in range(args.fast)
+        ),
+    )
+    print(f"slow clients: {args.slow}, fast clients: {args.fast}")
+    print(f"requests/s: {len(latencies) / args.duration:.1f}")
+    print(f"errors: {len(errors)}")
+    if len(latencies) > 1:
+        print(
+            "latency ms: "
+            f"p50={percentile(latencies, 50):.1f} "
+            f"p95={percentile(latencies, 95):.1f} "
+            f"p99={percentile(latencies, 99):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
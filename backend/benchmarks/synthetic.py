@@ -0,0 +1,249 @@
+"""
+Генератор синтетических данных для бенчмарков и нагрузочных тестов.
+
+Создаёт пользователей, подписки, рецепты с ингредиентами и тегами,
+избранное и корзины. Распределения скошены, как в живых данных:
+у немногих авторов большинство подписчиков и рецептов, ингредиентов в
+рецепте от 3 до 12. Справочники ингредиентов и тегов загружаются из
+data/, если база пуста. Все пользователи получают пароль
+SYNTHETIC_PASSWORD и имена user<N>.
+
+    python benchmarks/synthetic.py --scale small
+    python benchmarks/synthetic.py --scale large --seed 7
+
+Заполняет базу из настроек, поэтому с ENVIRONMENT=production требует
+--force.
+"""
+import os
+
+import argparse
+import random
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram_backend.settings")
+
+SYNTHETIC_PASSWORD = "benchmark-password"
+BATCH_SIZE = 5000
+
+SCALES = {
+    "tiny": {
+        "users": 50,
+        "recipes": 200,
+        "follows_per_user": 5,
+        "favorites_per_user": 5,
+        "cart_per_user": 3,
+    },
+    "small": {
+        "users": 1000,
+        "recipes": 10000,
+        "follows_per_user": 20,
+        "favorites_per_user": 20,
+        "cart_per_user": 5,
+    },
+    "medium": {
+        "users": 10000,
+        "recipes": 100000,
+        "follows_per_user": 50,
+        "favorites_per_user": 30,
+        "cart_per_user": 8,
+    },
+    "large": {
+        "users": 50000,
+        "recipes": 500000,
+        "follows_per_user": 100,
+        "favorites_per_user": 50,
+        "cart_per_user": 10,
+    },
+}
+INGREDIENTS_PER_RECIPE = (3, 12)
+TAGS_PER_RECIPE = (1, 3)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--force", action="store_true")
+    return parser.parse_args()
+
+
+def skewed(rng, population, count):
+    """count различных элементов, первые выбираются чаще (Парето)."""
+    count = min(count, max(len(population) // 2, 1))
+    chosen = set()
+    while len(chosen) < count:
+        index = int(rng.paretovariate(1.2)) - 1
+        chosen.add(population[index % len(population)])
+    return chosen
+
+
+def load_catalogue():
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    from recipes.models import Ingredient, Tag
+
+    for model, command in (
+        (Ingredient, "add_ingredients_from_csv"),
+        (Tag, "add_tags_from_csv"),
+    ):
+        if not model.objects.exists():
+            call_command(command, stdout=StringIO())
+
+
+def populate(scale="small", seed=1, progress=print):
+    """
+    Заполняет базу данными масштаба scale и возвращает число записей.
+
+    Запись идёт bulk_create без сигналов, поэтому в конце пересчитываются
+    счётчики и материализованные ленты.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from recipes import counters, feed
+    from recipes.models import (
+        FavouriteRecipe,
+        Follow,
+        Ingredient,
+        Recipe,
+        RecipeIngredient,
+        ShoppingBusket,
+        Tag,
+        User,
+    )
+
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    load_catalogue()
+    password = make_password(SYNTHETIC_PASSWORD)
+    first_user = User.objects.count()
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"user{number}",
+                email=f"user{number}@example.com",
+                first_name="Пользователь",
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(first_user, first_user + sizes["users"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith="user")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    progress(f"Пользователи: {len(user_ids)}")
+
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in skewed(
+                rng, user_ids, sizes["follows_per_user"]
+            )
+            if author_id != user_id
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    progress(f"Подписки: {Follow.objects.count()}")
+
+    first_recipe = Recipe.objects.order_by("-pk").values_list(
+        "pk", flat=True
+    ).first() or 0
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=next(iter(skewed(rng, user_ids, 1))),
+                name=f"Рецепт {number}",
+                text="Синтетический рецепт для нагрузочного теста",
+                cooking_time=rng.randint(5, 180),
+            )
+            for number in range(sizes["recipes"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(pk__gt=first_recipe).values_list(
+            "pk", flat=True
+        )
+    )
+    progress(f"Рецепты: {len(recipe_ids)}")
+
+    ingredient_ids = list(Ingredient.objects.values_list("pk", flat=True))
+    tag_ids = list(Tag.objects.values_list("pk", flat=True))
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, rng.randint(*INGREDIENTS_PER_RECIPE)
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(
+                tag_ids, min(len(tag_ids), rng.randint(*TAGS_PER_RECIPE))
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    progress(f"Ингредиенты в рецептах: {RecipeIngredient.objects.count()}")
+
+    for model, per_user in (
+        (FavouriteRecipe, sizes["favorites_per_user"]),
+        (ShoppingBusket, sizes["cart_per_user"]),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in skewed(rng, recipe_ids, per_user)
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    progress(
+        f"Избранное: {FavouriteRecipe.objects.count()}, "
+        f"корзины: {ShoppingBusket.objects.count()}"
+    )
+
+    counters.recount()
+    feed.rebuild()
+    return {
+        "users": len(user_ids),
+        "recipes": len(recipe_ids),
+        "follows": Follow.objects.count(),
+    }
+
+
+def main(args):
+    import django
+
+    django.setup()
+    from django.conf import settings
+
+    if settings.ENVIRONMENT == "production" and not args.force:
+        sys.exit("ENVIRONMENT=production: добавьте --force")
+    started = time.perf_counter()
+    populate(args.scale, args.seed)
+    print(f"Готово за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main(parse_args())
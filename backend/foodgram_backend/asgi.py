@@ -9,9 +9,18 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram_backend.settings")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# Обработчик Django с поддержкой асинхронных потоковых ответов.
+from foodgram_backend.streaming import ASGIHandler  # noqa: E402
+
+
+application = ASGIHandler()
+
+# Проверка простаивающих соединений с базой в начале запроса.
+import foodgram_backend.db  # noqa: E402,F401
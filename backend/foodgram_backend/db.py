@@ -0,0 +1,42 @@
+"""
+Проверка постоянных соединений с базой (замена CONN_HEALTH_CHECKS,
+которого нет в Django 3.2).
+
+Соединение, на котором запрос упал с ошибкой базы, Django сам
+проверяет и закрывает в начале следующего запроса (errors_occurred).
+Здесь дополнительно проверяются только соединения, простоявшие без
+дела дольше DB_HEALTH_CHECK_IDLE_SECONDS: именно они чаще всего
+оказываются разорваны после перезапуска PostgreSQL или PgBouncer.
+Активно используемые соединения лишнего SELECT 1 не получают.
+
+Подключается из wsgi.py и asgi.py.
+"""
+import time
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+@receiver(request_started)
+def check_idle_connections(sender, **kwargs):
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    now = time.monotonic()
+    for conn in connections.all():
+        if (
+            conn.connection is not None
+            and not conn.in_atomic_block
+            and now - getattr(conn, "last_used_at", now)
+            > settings.DB_HEALTH_CHECK_IDLE_SECONDS
+            and not conn.is_usable()
+        ):
+            conn.close()
+
+
+@receiver(request_finished)
+def remember_connection_use(sender, **kwargs):
+    now = time.monotonic()
+    for conn in connections.all():
+        if conn.connection is not None:
+            conn.last_used_at = now
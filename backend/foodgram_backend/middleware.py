@@ -0,0 +1,31 @@
+from contextlib import ExitStack
+from django.db import connections
+
+
+class QueryCountMiddleware:
+    """
+    Добавляет к ответу заголовок X-DB-Queries с числом SQL-запросов.
+
+    Нужен нагрузочным тестам (benchmarks/locustfile.py), включается
+    QUERY_COUNT_HEADER. Считаются запросы ко всем базам, включая
+    реплики; запросы, выполненные при отдаче потокового ответа, в
+    заголовок не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response["X-DB-Queries"] = str(count)
+        return response
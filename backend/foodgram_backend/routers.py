@@ -0,0 +1,149 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+use_primary = ContextVar("use_primary", default=False)
+read_replica = ContextVar("read_replica", default=None)
+
+
+@contextmanager
+def read_from_primary():
+    """Читает из основной базы, например при заполнении кэша."""
+    token = use_primary.set(True)
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Направляет чтение на реплики, а запись — на основную базу.
+
+    Чтение уходит на основную базу, если запрос изменяет данные или
+    пользователь недавно что-то записал (см. ReplicaStickinessMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or use_primary.get():
+            return "default"
+        return read_replica.get() or random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Закрепляет запросы за основной базой.
+
+    Небезопасные методы работают только с основной базой. После успешной
+    записи клиент получает cookie, и его чтения ещё
+    REPLICA_STICKY_SECONDS идут на основную базу, чтобы он сразу видел
+    свои изменения несмотря на отставание реплик. Клиенты без cookie
+    могут передать заголовок X-Read-Primary.
+
+    Реплика выбирается одна на запрос, чтобы ответ не смешивал снимки с
+    разным отставанием. Потоковые ответы читают базу уже после выхода
+    из middleware, поэтому выбор сохраняется и на время отдачи тела.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Под ASGI middleware остаётся асинхронным, иначе Django
+        # выполнял бы цепочку в одном потоке через sync_to_async.
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    @staticmethod
+    def pinned(content, primary, replica):
+        previous = use_primary.get(), read_replica.get()
+        use_primary.set(primary)
+        read_replica.set(replica)
+        try:
+            yield from content
+        finally:
+            use_primary.set(previous[0])
+            read_replica.set(previous[1])
+
+    @staticmethod
+    async def apinned(content, primary, replica):
+        previous = use_primary.get(), read_replica.get()
+        use_primary.set(primary)
+        read_replica.set(replica)
+        try:
+            async for part in content:
+                yield part
+        finally:
+            use_primary.set(previous[0])
+            read_replica.set(previous[1])
+
+    @staticmethod
+    def choose(request):
+        primary = (
+            request.method not in SAFE_METHODS
+            or settings.REPLICA_STICKY_COOKIE in request.COOKIES
+            or "X-Read-Primary" in request.headers
+        )
+        replica = (
+            random.choice(settings.DATABASE_REPLICAS)
+            if settings.DATABASE_REPLICAS
+            else None
+        )
+        return primary, replica
+
+    def process_response(self, request, response, primary, replica):
+        if getattr(response, "is_async", False):
+            response.streaming_content = self.apinned(
+                response.streaming_content, primary, replica
+            )
+        elif response.streaming:
+            response.streaming_content = self.pinned(
+                response.streaming_content, primary, replica
+            )
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        primary, replica = self.choose(request)
+        tokens = use_primary.set(primary), read_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(tokens[0])
+            read_replica.reset(tokens[1])
+        return self.process_response(request, response, primary, replica)
+
+    async def __acall__(self, request):
+        primary, replica = self.choose(request)
+        tokens = use_primary.set(primary), read_replica.set(replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_primary.reset(tokens[0])
+            read_replica.reset(tokens[1])
+        return self.process_response(request, response, primary, replica)
@@ -1,5 +1,6 @@
 import os
 
+import sys
 from django.core.management.utils import get_random_secret_key
 from dotenv import load_dotenv
 from pathlib import Path
@@ -45,6 +46,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+QUERY_COUNT_HEADER = (
+    os.getenv("QUERY_COUNT_HEADER", "false").lower() == "true"
+)
+
+if QUERY_COUNT_HEADER:
+    MIDDLEWARE.insert(0, "foodgram_backend.middleware.QueryCountMiddleware")
+
 ROOT_URLCONF = "foodgram_backend.urls"
 
 TEMPLATES = [
@@ -65,6 +73,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 0))
+
+DB_CONN_HEALTH_CHECKS = (
+    os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+)
+
+DB_HEALTH_CHECK_IDLE_SECONDS = int(
+    os.getenv("DB_HEALTH_CHECK_IDLE_SECONDS", 30)
+)
+
 POSTGRES_DB = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -73,9 +93,20 @@ POSTGRES_DB = {
         "PASSWORD": os.getenv("DB_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", ""),
         "PORT": os.getenv("DB_PORT", 5432),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "OPTIONS": {
+            "application_name": os.getenv("DB_APPLICATION_NAME", "foodgram"),
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
+if DB_STATEMENT_TIMEOUT and not DB_PGBOUNCER:
+    POSTGRES_DB["default"]["OPTIONS"]["options"] = (
+        f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    )
+
 SQLITE_DB = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -85,6 +116,72 @@ SQLITE_DB = {
 
 DATABASES = POSTGRES_DB if ENVIRONMENT == "production" else SQLITE_DB
 
+# Хосты реплик PostgreSQL или, локально, пути к файлам SQLite.
+DATABASE_REPLICAS = []
+
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "TEST": {"MIRROR": "default"},
+    }
+    if ENVIRONMENT == "production":
+        DATABASES[alias]["HOST"] = replica.strip()
+    else:
+        DATABASES[alias]["NAME"] = os.path.join(BASE_DIR, replica.strip())
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["foodgram_backend.routers.PrimaryReplicaRouter"]
+
+if DATABASE_REPLICAS:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "foodgram_backend.routers.ReplicaStickinessMiddleware",
+    )
+
+REPLICA_STICKY_COOKIE = "read_primary"
+
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+if ENVIRONMENT == "production":
+    INSTALLED_APPS.append("django.contrib.postgres")
+
+# Кэш должен быть общим для всех экземпляров приложения: в нём лежат
+# версии ленты и индекса ингредиентов и короткие ссылки. В production
+# это memcached (CACHE_LOCATION — адрес сервера), локально — файлы.
+if ENVIRONMENT == "production":
+    DEFAULT_CACHE_BACKEND = (
+        "django.core.cache.backends.memcached.PyMemcacheCache"
+    )
+    DEFAULT_CACHE_LOCATION = "memcached:11211"
+else:
+    DEFAULT_CACHE_BACKEND = (
+        "django.core.cache.backends.filebased.FileBasedCache"
+    )
+    DEFAULT_CACHE_LOCATION = "/tmp/foodgram_cache"
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", DEFAULT_CACHE_BACKEND),
+        "LOCATION": os.getenv("CACHE_LOCATION", DEFAULT_CACHE_LOCATION),
+    }
+}
+
+# Тесты очищают кэш, поэтому у них свой, в памяти процесса.
+if sys.argv[1:2] == ["test"] or "pytest" in sys.modules:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "foodgram-tests",
+        }
+    }
+
+INGREDIENT_INDEX_ENABLED = (
+    os.getenv("INGREDIENT_INDEX_ENABLED", "true").lower() == "true"
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,6 +214,10 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+ASGI_ENABLED = os.getenv("ASGI_ENABLED", "false").lower() == "true"
+
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", 2))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "recipes.User"
@@ -128,6 +229,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
 }
 
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv("PAGINATION_MAX_PAGE_SIZE", 100))
+
+PAGINATION_COUNT_MODE = os.getenv("PAGINATION_COUNT_MODE", "exact")
+
+FEED_MATERIALIZE_THRESHOLD = int(os.getenv("FEED_MATERIALIZE_THRESHOLD", 0))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,83 @@
+"""
+Потоковые ответы с асинхронным итератором для ASGI.
+
+ASGIHandler из Django 3.2 перебирает streaming_content обычным циклом
+прямо в цикле событий, поэтому генератор, который обращается к ORM,
+падает с SynchronousOnlyOperation. AsyncStreamingHttpResponse хранит
+асинхронный итератор, а ASGIHandler отдаёт его части через async for
+(в Django 4.2 это умеет сам StreamingHttpResponse). AsyncClient из
+Django 3.2 такие ответы не перебирает, в тестах запросы идут прямо в
+ASGI-приложение.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+from django.http import StreamingHttpResponse
+from itertools import islice
+
+
+async def iterate_in_thread(iterator, batch_size):
+    """Части синхронного итератора, по batch_size за вызов sync_to_async."""
+    take = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while True:
+        parts = await take()
+        if not parts:
+            return
+        for part in parts:
+            yield part
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse с асинхронным итератором содержимого.
+
+    Синхронный итератор, например генератор, который читает базу,
+    перебирается в потоке sync_to_async по thread_batch_size частей.
+    """
+
+    is_async = True
+    thread_batch_size = 500
+
+    @property
+    def streaming_content(self):
+        return self._iterator
+
+    @streaming_content.setter
+    def streaming_content(self, value):
+        if not hasattr(value, "__aiter__"):
+            value = iterate_in_thread(iter(value), self.thread_batch_size)
+        self._iterator = value
+
+    def __iter__(self):
+        # Синхронный цикл ASGIHandler ничего не получает: части
+        # отправляет ASGIHandler.send_response ниже.
+        return iter(())
+
+    async def chunks(self):
+        async for part in self._iterator:
+            yield self.make_bytes(part)
+
+
+class ASGIHandler(DjangoASGIHandler):
+    """ASGIHandler, который умеет отдавать AsyncStreamingHttpResponse."""
+
+    async def send_response(self, response, send):
+        if not getattr(response, "is_async", False):
+            return await super().send_response(response, send)
+
+        async def send_body_first(message):
+            # Перед закрывающим сообщением без тела отправляются части.
+            if message["type"] == "http.response.body" and (
+                "body" not in message
+            ):
+                async for part in response.chunks():
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+            await send(message)
+
+        await super().send_response(response, send_body_first)
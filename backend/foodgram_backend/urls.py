@@ -3,10 +3,21 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api import async_views, views
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path(
+        "s/<str:code>/",
+        (
+            async_views.short_link_redirect
+            if settings.ASGI_ENABLED
+            else views.short_link_redirect
+        ),
+        name="short-link",
+    ),
 ]
 
 if settings.DEBUG:
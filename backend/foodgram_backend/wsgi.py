@@ -15,3 +15,6 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram_backend.settings")
 
 application = get_wsgi_application()
+
+# Проверка простаивающих соединений с базой в начале запроса.
+import foodgram_backend.db  # noqa: E402,F401
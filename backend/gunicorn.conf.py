@@ -0,0 +1,22 @@
+import os
+
+import logging
+
+
+wsgi_app = "foodgram_backend.wsgi:application"
+
+if os.getenv("ASGI_ENABLED", "false").lower() == "true":
+    wsgi_app = "foodgram_backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def post_worker_init(worker):
+    """Строит индекс ингредиентов при старте воркера."""
+    from recipes.ingredient_index import ingredient_index
+
+    try:
+        ingredient_index.refresh()
+    except Exception as ex:
+        logging.getLogger(__name__).warning(
+            "Ingredient index will be built on first request: %s", ex
+        )
@@ -33,6 +33,10 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ("name", "author", "tag_list", "favorites_count")
     search_fields = ["name", "author__username"]
     list_filter = ["tags"]
+    list_select_related = ["author"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("tags")
 
     def tag_list(self, obj):
         return ", ".join(tag.name for tag in obj.tags.all())
@@ -40,10 +44,9 @@ class RecipeAdmin(admin.ModelAdmin):
     tag_list.short_description = "Теги"
 
     def favorites_count(self, obj):
-        count = obj.favorite_recipes.count()
         return format_html(
             '<span style="color: green;">' "Добавлений в избранное: {}</span>",
-            count,
+            obj.favorites_count,
         )
 
     favorites_count.short_description = "Количество добавлений в избранное"
@@ -52,22 +55,28 @@ class RecipeAdmin(admin.ModelAdmin):
 @admin.register(User)
 class FoodgramUserAdmin(UserAdmin):
     search_fields = ("username", "email")
-    list_display = ("id", "first_name", "last_name", "username", "email")
+    list_display = (
+        "id",
+        "first_name",
+        "last_name",
+        "username",
+        "email",
+        "followers_count",
+        "recipes_count",
+    )
 
     def followers_count(self, obj):
-        count = obj.followers.count()
         return format_html(
             '<span style="color: green;">' "Подписчиков: {}</span>",
-            count,
+            obj.followers_count,
         )
 
     followers_count.short_description = "Количество подписчиков"
 
     def recipes_count(self, obj):
-        count = obj.recipes.count()
         return format_html(
             '<span style="color: green;">' "Рецептов: {}</span>",
-            count,
+            obj.recipes_count,
         )
 
     recipes_count.short_description = "Количество рецептов"
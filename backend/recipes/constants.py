@@ -5,6 +5,8 @@ MAX_LENGTH_TAG_CHAR_FIELD = 32
 MAX_LENGTH_EMAIL = 254
 MAX_LENGTH_USERNAME = 150
 SHORT_TITLE = 128
+MAX_LENGTH_SHORT_LINK_CODE = 16
+MAX_LENGTH_RENDITIONS_FOR = 100
 MAX_STR = 30
 
 MIN_LENGTH_PASSWORD = 8
@@ -13,11 +15,88 @@ MIN_AMOUNT_VALUE = 1
 MIN_COUNT_ADMIN = 1
 
 DEFAULT_PAGE_SIZE = 6
+PAGINATION_QUERY_PARAM = "pagination"
+CURSOR_MODE = "cursor"
+CURSOR_POSITION_SEPARATOR = "|"
+COUNT_QUERY_PARAM = "count"
+COUNT_MODE_APPROXIMATE = "approximate"
+COUNT_MODE_NONE = "none"
+APPROXIMATE_COUNT_THRESHOLD = 100000
+
+TAGS_MATCH_ANY = "any"
+TAGS_MATCH_ALL = "all"
+TAGS_MATCH_CHOICES = (
+    (TAGS_MATCH_ANY, "Любой из тегов"),
+    (TAGS_MATCH_ALL, "Все теги"),
+)
+
+INGREDIENT_AUTOCOMPLETE_LIMIT = 10
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = 50
+
+INGREDIENT_INDEX_VERSION_KEY = "ingredient_index_version"
+INGREDIENT_INDEX_CHECK_INTERVAL = 1
+INGREDIENT_INDEX_DB_CHECK_INTERVAL = 60
+
+HTTP_CACHE_MAX_AGE = 60
+
+RECIPE_FEED_VERSION_KEY = "recipe_feed_version"
+RECIPE_FEED_CACHE_TIMEOUT = 300
+
+BASE62_ALPHABET = (
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60 * 24
+RECIPE_FRONTEND_URL = "/recipes/{}"
+
+FEED_BATCH_SIZE = 1000
+
+BATCH_MAX_SIZE = 100
+BATCH_CREATED = "created"
+BATCH_DELETED = "deleted"
+BATCH_EXISTS = "exists"
+BATCH_ABSENT = "absent"
+BATCH_NOT_FOUND = "not_found"
+
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+IMAGE_MIME_TYPES = {
+    "image/jpeg": ("jpg", "JPEG"),
+    "image/png": ("png", "PNG"),
+    "image/gif": ("gif", "GIF"),
+    "image/webp": ("webp", "WEBP"),
+}
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_SPOOL_MAX_SIZE = 1024 * 1024
+RENDITIONS_DIR = "renditions"
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITIONS = {
+    "card": (480, 480),
+    "detail": (1200, 1200),
+    "avatar": (160, 160),
+}
+RECIPE_RENDITIONS = ("card", "detail")
+AVATAR_RENDITIONS = ("avatar",)
+
+SHOPPING_LIST_FILENAME = "foodgram"
+SHOPPING_LIST_FORMATS = {
+    "txt": "text/plain",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+SHOPPING_LIST_CHUNK_SIZE = 2000
 
 USER_NAME_REGEX = r"^[\w.@+-]+\Z"
 NON_VALID_USERNAME = r"me"
 
 FILES = {
-    "ingredients": "/data/ingredients.csv",
-    "tags": "/data/tags.csv"
+    "ingredients": "data/ingredients.csv",
+    "tags": "data/tags.csv"
 }
+IMPORT_BATCH_SIZE = 5000
+IMPORT_JSON_CHUNK_SIZE = 64 * 1024
+IMPORT_MODE_INSERT = "insert"
+IMPORT_MODE_UPSERT = "upsert"
+IMPORT_MODES = (IMPORT_MODE_INSERT, IMPORT_MODE_UPSERT)
+RECIPE_TRANSFER_BATCH_SIZE = 1000
+RECIPE_TRANSFER_ERRORS_LIMIT = 100
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
@@ -0,0 +1,61 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import (
+    FavouriteRecipe,
+    Follow,
+    Recipe,
+    ShoppingBusket,
+    User,
+)
+
+
+COUNTERS = (
+    (User, "recipes_count", Recipe, "author"),
+    (User, "followers_count", Follow, "author"),
+    (User, "following_count", Follow, "user"),
+    (Recipe, "favorites_count", FavouriteRecipe, "recipe"),
+    (Recipe, "in_carts_count", ShoppingBusket, "recipe"),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно меняет счётчик на delta, не опуская его ниже нуля."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def count_subquery(model, field):
+    """Подзапрос с числом строк model, ссылающихся на внешнюю запись."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики по фактическим данным."""
+    for model, counter, related_model, field in COUNTERS:
+        model.objects.update(
+            **{counter: count_subquery(related_model, field)}
+        )
+
+
+def refresh_counters(related_model, pks):
+    """
+    Пересчитывает счётчики, зависящие от related_model, у записей pks.
+
+    Нужен после массовых операций, которые не отправляют сигналы.
+    """
+    for model, counter, counted_model, field in COUNTERS:
+        if counted_model is related_model:
+            model.objects.filter(pk__in=pks).update(
+                **{counter: count_subquery(related_model, field)}
+            )
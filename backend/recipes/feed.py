@@ -0,0 +1,133 @@
+"""
+Материализованная лента подписок (fan-out on write).
+
+Обычно лента строится при чтении одним запросом по подпискам. Для
+пользователей, у которых подписок не меньше FEED_MATERIALIZE_THRESHOLD,
+такой запрос дорожает, поэтому новые рецепты заранее раскладываются
+по их лентам в FeedEntry. Порог 0 отключает материализацию.
+"""
+from django.conf import settings
+from django.db.models import F, Subquery
+
+from recipes.constants import FEED_BATCH_SIZE
+from recipes.models import FeedEntry, Follow, Recipe, User
+
+
+def is_materialized(following_count):
+    threshold = settings.FEED_MATERIALIZE_THRESHOLD
+    return bool(threshold) and following_count >= threshold
+
+
+def following_feed(queryset, user, materialized=None):
+    """
+    Рецепты из queryset от авторов, на которых подписан user.
+
+    Без материализации — полусоединение по подпискам с индексом
+    (author, -created_at), иначе — чтение FeedEntry по индексу
+    (user, -created_at). Порядок от новых к старым с pk для курсора.
+    """
+    if materialized is None:
+        materialized = is_materialized(user.following_count)
+    if materialized:
+        return queryset.filter(feed_entries__user=user).annotate(
+            feed_created_at=F("feed_entries__created_at")
+        ).order_by("-feed_created_at", "-pk")
+    return queryset.filter(
+        author__in=Subquery(
+            Follow.objects.filter(user=user).values("author")
+        )
+    ).order_by("-created_at", "-pk")
+
+
+def following_count(user_id):
+    return (
+        User.objects.filter(pk=user_id)
+        .values_list("following_count", flat=True)
+        .first()
+    ) or 0
+
+
+def backfill(user_id, author_ids):
+    """Добавляет в ленту пользователя рецепты указанных авторов."""
+    entries = []
+    for recipe_id, created_at in (
+        Recipe.objects.filter(author__in=author_ids)
+        .order_by()
+        .values_list("pk", "created_at")
+        .iterator(chunk_size=FEED_BATCH_SIZE)
+    ):
+        entries.append(
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, created_at=created_at
+            )
+        )
+        if len(entries) == FEED_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def fan_out(recipe):
+    """Раскладывает новый рецепт по материализованным лентам."""
+    fan_out_many([recipe])
+
+
+def fan_out_many(recipes):
+    """Раскладывает пачку новых рецептов по материализованным лентам."""
+    if not settings.FEED_MATERIALIZE_THRESHOLD or not recipes:
+        return
+    by_author = {}
+    for recipe in recipes:
+        by_author.setdefault(recipe.author_id, []).append(recipe)
+    followers = Follow.objects.filter(
+        author__in=by_author,
+        user__following_count__gte=settings.FEED_MATERIALIZE_THRESHOLD,
+    ).values_list("user_id", "author_id")
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe.pk,
+                created_at=recipe.created_at,
+            )
+            for user_id, author_id in followers.iterator(
+                chunk_size=FEED_BATCH_SIZE
+            )
+            for recipe in by_author[author_id]
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow(user_id, author_id):
+    count = following_count(user_id)
+    if not is_materialized(count):
+        return
+    if count == settings.FEED_MATERIALIZE_THRESHOLD:
+        # Порог только что достигнут: лента строится целиком.
+        backfill(
+            user_id, Follow.objects.filter(user=user_id).values("author")
+        )
+    else:
+        backfill(user_id, [author_id])
+
+
+def unfollow(user_id, author_id):
+    if not settings.FEED_MATERIALIZE_THRESHOLD:
+        return
+    entries = FeedEntry.objects.filter(user=user_id)
+    if is_materialized(following_count(user_id)):
+        entries = entries.filter(recipe__author=author_id)
+    entries.delete()
+
+
+def rebuild():
+    """Перестраивает все ленты, например после смены порога."""
+    FeedEntry.objects.all().delete()
+    if not settings.FEED_MATERIALIZE_THRESHOLD:
+        return
+    for user_id in User.objects.filter(
+        following_count__gte=settings.FEED_MATERIALIZE_THRESHOLD
+    ).values_list("pk", flat=True):
+        backfill(user_id, Follow.objects.filter(user=user_id).values("author"))
@@ -0,0 +1,158 @@
+import os
+from io import BytesIO
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connections
+from django.dispatch import Signal
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, features
+
+from recipes.constants import (
+    IMAGE_RENDITION_QUALITY,
+    IMAGE_RENDITIONS,
+    RENDITIONS_DIR,
+)
+
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+RENDITION_EXTENSION = RENDITION_FORMAT.lower()
+
+executor = None
+pending = set()
+pending_lock = threading.Lock()
+
+# Отправляется, когда все копии файла name для поля field_name модели
+# sender созданы.
+renditions_ready = Signal()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Одинаковые изображения сохраняются один раз: повторная загрузка
+    возвращает имя уже существующего файла. Поэтому файлы из этого
+    хранилища нельзя удалять вместе с записью — их могут использовать
+    другие объекты.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest[:2], f"{digest}{extension}"
+        )
+        if self.exists(name):
+            return name
+        return self._save(name, content)
+
+
+def rendition_name(name, rendition):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{RENDITIONS_DIR}/{rendition}/{stem}.{RENDITION_EXTENSION}"
+
+
+def make_rendition(storage, name, rendition):
+    target = rendition_name(name, rendition)
+    if default_storage.exists(target):
+        return
+    with storage.open(name) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(IMAGE_RENDITIONS[rendition])
+        if image.mode not in ("RGB", "RGBA") or RENDITION_FORMAT == "JPEG":
+            image = image.convert("RGB")
+        buffer = BytesIO()
+        image.save(
+            buffer, RENDITION_FORMAT, quality=IMAGE_RENDITION_QUALITY
+        )
+    default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def generate_renditions(storage, name, renditions, model, field_name):
+    key = (name, renditions)
+    try:
+        for rendition in renditions:
+            make_rendition(storage, name, rendition)
+    except Exception:
+        logger.exception("Renditions %s of %s failed", renditions, name)
+    else:
+        renditions_ready.send(model, field_name=field_name, name=name)
+    finally:
+        with pending_lock:
+            pending.discard(key)
+
+
+def generate_in_background(*args):
+    try:
+        generate_renditions(*args)
+    finally:
+        # Соединения потока пула не закрываются обработкой запросов.
+        connections.close_all()
+
+
+def schedule_renditions(field_file, renditions):
+    """
+    Ставит генерацию уменьшенных копий изображения в фоновый пул.
+
+    При IMAGE_RENDITION_WORKERS = 0 копии создаются сразу. Один и тот же
+    набор копий файла не обрабатывается параллельно дважды. По
+    готовности отправляется renditions_ready.
+    """
+    global executor
+    if not field_file:
+        return
+    renditions = tuple(renditions)
+    key = (field_file.name, renditions)
+    with pending_lock:
+        if key in pending:
+            return
+        pending.add(key)
+    field = field_file.field
+    args = (
+        field_file.storage,
+        field_file.name,
+        renditions,
+        field.model,
+        field.name,
+    )
+    if not settings.IMAGE_RENDITION_WORKERS:
+        generate_renditions(*args)
+        return
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_RENDITION_WORKERS,
+            thread_name_prefix="renditions",
+        )
+    executor.submit(generate_in_background, *args)
+
+
+def rendition_urls(field_file, renditions, ready_for):
+    """
+    URL уменьшенных копий изображения.
+
+    ready_for — имя файла, для которого копии уже созданы (поле
+    <поле>_renditions_for), поэтому хранилище не опрашивается.
+    """
+    if not field_file or field_file.name != ready_for:
+        return {}
+    return {
+        rendition: default_storage.url(
+            rendition_name(field_file.name, rendition)
+        )
+        for rendition in renditions
+    }
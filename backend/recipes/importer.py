@@ -0,0 +1,351 @@
+"""
+Пакетный импорт справочников (ингредиенты, теги) из CSV и JSON.
+
+Строки читаются потоком и записываются пачками по batch_size. Для
+каждой пачки одним запросом находятся уже существующие записи, поэтому
+повторный запуск ничего не ломает, а в режиме dry_run выводится только
+разница с базой. В PostgreSQL можно включить загрузку через COPY во
+временную таблицу и INSERT ... ON CONFLICT.
+"""
+import os
+import re
+from io import StringIO
+
+import csv
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from itertools import islice
+
+from recipes.constants import (
+    FILES,
+    IMPORT_BATCH_SIZE,
+    IMPORT_JSON_CHUNK_SIZE,
+    IMPORT_MODE_UPSERT,
+    IMPORT_MODES,
+)
+
+
+WHITESPACE = re.compile(r"\s*")
+NUMBER_TAIL = re.compile(r"[\d.eE+-]*\Z")
+
+
+def json_array_items(file, chunk_size=IMPORT_JSON_CHUNK_SIZE):
+    """
+    Элементы JSON-массива из file по одному.
+
+    Файл читается кусками по chunk_size символов, в памяти — только
+    текущий кусок и разбираемый элемент.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = "", 0
+
+    def read_more():
+        nonlocal buffer, position
+        chunk = file.read(chunk_size)
+        if chunk:
+            buffer, position = buffer[position:] + chunk, 0
+        return bool(chunk)
+
+    def next_char():
+        nonlocal position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more():
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("JSON: ожидается массив объектов")
+    position += 1
+    if next_char() == "]":
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            # Число на границе куска могло оборваться на середине.
+            if not NUMBER_TAIL.match(buffer, end) or not read_more():
+                break
+        position = end
+        yield item
+        char = next_char()
+        position += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError("JSON: ожидается , или ]")
+
+
+def read_rows(path, fields):
+    """
+    Строки файла как словари с ключами fields.
+
+    CSV без заголовка (столбцы по порядку fields), JSON — массив
+    объектов, JSON Lines (.jsonl, .ndjson) — по объекту на строку.
+    Все форматы читаются потоком, JSON — через json_array_items.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8") as file:
+        if extension == ".json":
+            rows = json_array_items(file)
+        elif extension in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            rows = (
+                dict(zip(fields, row)) for row in csv.reader(file) if row
+            )
+        for row in rows:
+            yield {field: str(row[field]).strip() for field in fields}
+
+
+class CatalogueImporter:
+    """
+    Импорт строк в model с уникальным ключом key_fields.
+
+    В режиме insert существующие записи пропускаются, в режиме upsert у
+    них обновляются остальные поля. Результат — словарь со счётчиками
+    created, updated и unchanged и примерами изменений для dry_run.
+    """
+
+    sample_size = 10
+
+    def __init__(
+        self,
+        model,
+        key_fields,
+        update_fields=(),
+        mode=IMPORT_MODE_UPSERT,
+        batch_size=IMPORT_BATCH_SIZE,
+        dry_run=False,
+        progress=None,
+    ):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.update_fields = tuple(update_fields)
+        self.upsert = mode == IMPORT_MODE_UPSERT and bool(update_fields)
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.stats = {"created": 0, "updated": 0, "unchanged": 0}
+        self.samples = {"created": [], "updated": []}
+
+    def key(self, row):
+        return tuple(row[field] for field in self.key_fields)
+
+    def batches(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = {}
+            for row in islice(rows, self.batch_size):
+                batch[self.key(row)] = row
+            if not batch:
+                return
+            yield batch
+
+    def existing(self, batch):
+        first = self.key_fields[0]
+        objects = self.model.objects.filter(
+            **{f"{first}__in": {key[0] for key in batch}}
+        ).only("pk", *self.key_fields, *self.update_fields)
+        return {
+            tuple(getattr(obj, field) for field in self.key_fields): obj
+            for obj in objects
+        }
+
+    def remember(self, kind, row):
+        self.stats[kind] += 1
+        if len(self.samples[kind]) < self.sample_size:
+            self.samples[kind].append(row)
+
+    def import_batch(self, batch):
+        existing = self.existing(batch)
+        created, updated = [], []
+        for key, row in batch.items():
+            obj = existing.get(key)
+            if obj is None:
+                created.append(self.model(**row))
+                self.remember("created", row)
+            elif self.upsert and any(
+                getattr(obj, field) != row[field]
+                for field in self.update_fields
+            ):
+                for field in self.update_fields:
+                    setattr(obj, field, row[field])
+                obj.updated_at = timezone.now()
+                updated.append(obj)
+                self.remember("updated", row)
+            else:
+                self.stats["unchanged"] += 1
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            self.model.objects.bulk_create(created, ignore_conflicts=True)
+            if updated:
+                self.model.objects.bulk_update(
+                    updated, [*self.update_fields, "updated_at"]
+                )
+
+    def run(self, rows):
+        processed = 0
+        for batch in self.batches(rows):
+            self.import_batch(batch)
+            processed += len(batch)
+            if self.progress:
+                self.progress(processed)
+        return self.stats
+
+    def run_copy(self, rows):
+        """
+        Быстрый путь PostgreSQL: COPY во временную таблицу и один
+        INSERT ... ON CONFLICT на всё содержимое файла. Пробный прогон
+        в этом режиме не поддерживается — для него есть run().
+        """
+        table = self.model._meta.db_table
+        columns = [*self.key_fields, *self.update_fields]
+        column_list = ", ".join(columns)
+        key_list = ", ".join(self.key_fields)
+        if self.upsert:
+            on_conflict = (
+                "DO UPDATE SET "
+                + ", ".join(
+                    f"{field} = EXCLUDED.{field}"
+                    for field in (*self.update_fields, "updated_at")
+                )
+                + " WHERE ("
+                + ", ".join(f"{table}.{f}" for f in self.update_fields)
+                + ", NULL) IS DISTINCT FROM ("
+                + ", ".join(f"EXCLUDED.{f}" for f in self.update_fields)
+                + ", NULL)"
+            )
+        else:
+            on_conflict = "DO NOTHING"
+        processed = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE import_rows ("
+                + ", ".join(f"{field} text" for field in columns)
+                + ") ON COMMIT DROP"
+            )
+            for batch in self.batches(rows):
+                buffer = StringIO()
+                csv.writer(buffer).writerows(
+                    [row[field] for field in columns]
+                    for row in batch.values()
+                )
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY import_rows ({column_list}) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                processed += len(batch)
+                if self.progress:
+                    self.progress(processed)
+            now = timezone.now()
+            cursor.execute(
+                f"INSERT INTO {table} "
+                f"({column_list}, is_active, created_at, updated_at) "
+                f"SELECT DISTINCT ON ({key_list}) {column_list}, "
+                f"TRUE, %s, %s FROM import_rows "
+                f"ON CONFLICT ({key_list}) {on_conflict} "
+                f"RETURNING (xmax = 0)",
+                [now, now],
+            )
+            inserted = [row[0] for row in cursor.fetchall()]
+        self.stats["created"] = sum(inserted)
+        self.stats["updated"] = len(inserted) - self.stats["created"]
+        self.stats["unchanged"] = processed - len(inserted)
+        return self.stats
+
+
+class CatalogueImportCommand(BaseCommand):
+    """
+    Общая часть команд импорта справочников.
+
+    Наследник задаёт model, key_fields, update_fields, columns (порядок
+    столбцов CSV), file_key (ключ в FILES) и при необходимости
+    after_import().
+    """
+
+    model = None
+    key_fields = ()
+    update_fields = ()
+    columns = ()
+    file_key = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="Файл .csv, .json или .jsonl (по умолчанию из data/)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--mode",
+            choices=IMPORT_MODES,
+            default=IMPORT_MODE_UPSERT,
+            help="insert — пропускать существующие, upsert — обновлять",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Загрузка через COPY (только PostgreSQL)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Показать изменения, не записывая их",
+        )
+
+    def after_import(self, stats):
+        pass
+
+    def handle(self, *args, **options):
+        path = options["path"] or os.path.join(
+            settings.BASE_DIR, FILES[self.file_key]
+        )
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть больше нуля")
+        use_copy = options["copy"] and not options["dry_run"]
+        if use_copy and connection.vendor != "postgresql":
+            raise CommandError("--copy доступен только в PostgreSQL")
+        importer = CatalogueImporter(
+            self.model,
+            self.key_fields,
+            self.update_fields,
+            mode=options["mode"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            progress=lambda count: self.stdout.write(
+                f"Обработано строк: {count}"
+            ),
+        )
+        rows = read_rows(path, self.columns)
+        try:
+            stats = (importer.run_copy if use_copy else importer.run)(rows)
+        except (KeyError, ValueError, DatabaseError) as error:
+            raise CommandError(f"{path}: {error!r}")
+        if options["dry_run"]:
+            for kind, samples in importer.samples.items():
+                for row in samples:
+                    self.stdout.write(f"{kind}: {row}")
+        else:
+            self.after_import(stats)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Создано: {created}, обновлено: {updated}, "
+                "без изменений: {unchanged}".format(**stats)
+            )
+        )
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from django.db.models import Count, Max
+
+from recipes.constants import (
+    INGREDIENT_INDEX_CHECK_INTERVAL,
+    INGREDIENT_INDEX_DB_CHECK_INTERVAL,
+    INGREDIENT_INDEX_VERSION_KEY,
+)
+from recipes.models import Ingredient
+from recipes.versions import bump_version, get_version
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для поиска по началу названия.
+
+    Хранит отсортированный список названий в нижнем регистре и ищет
+    по нему бинарным поиском, не обращаясь к базе данных. Версия
+    индекса лежит в кэше Django: при изменении ингредиентов сигналы
+    записывают новую версию, и каждый воркер перестраивает свою копию
+    при следующем обращении.
+
+    Если кэш не общий для воркеров (LocMemCache) или справочник изменён
+    в обход сигналов, версия не поменяется. На этот случай раз в
+    INGREDIENT_INDEX_DB_CHECK_INTERVAL секунд индекс сверяет число
+    ингредиентов и Max(updated_at) с базой.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.checked_at = None
+        self.db_checked_at = None
+        self.fingerprint = None
+        self.keys = []
+        self.rows = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def invalidate():
+        bump_version(INGREDIENT_INDEX_VERSION_KEY)
+
+    @staticmethod
+    def current_version():
+        return get_version(INGREDIENT_INDEX_VERSION_KEY)
+
+    @staticmethod
+    def db_fingerprint():
+        state = Ingredient.objects.using("default").aggregate(
+            count=Count("pk"), last_modified=Max("updated_at")
+        )
+        return state["count"], state["last_modified"]
+
+    def build(self, version):
+        fingerprint = self.db_fingerprint()
+        rows = sorted(
+            (
+                {"id": pk, "name": name, "measurement_unit": unit}
+                for pk, name, unit in Ingredient.objects.using(
+                    "default"
+                ).values_list("id", "name", "measurement_unit")
+            ),
+            key=lambda row: (row["name"].lower(), row["name"]),
+        )
+        self.keys = [row["name"].lower() for row in rows]
+        self.rows = rows
+        self.version = version
+        self.fingerprint = fingerprint
+        self.db_checked_at = time.monotonic()
+        logger.info("Ingredient index built: %s rows", len(rows))
+
+    def refresh(self):
+        now = time.monotonic()
+        if (
+            self.checked_at is not None
+            and now - self.checked_at < INGREDIENT_INDEX_CHECK_INTERVAL
+        ):
+            return
+        with self.lock:
+            version = self.current_version()
+            if (
+                version == self.version
+                and now - self.db_checked_at
+                >= INGREDIENT_INDEX_DB_CHECK_INTERVAL
+            ):
+                self.db_checked_at = now
+                if self.db_fingerprint() != self.fingerprint:
+                    self.invalidate()
+                    version = self.current_version()
+            if version != self.version:
+                self.build(version)
+            self.checked_at = now
+
+    def startswith(self, name, limit=None):
+        self.refresh()
+        prefix = name.lower()
+        keys, rows = self.keys, self.rows
+        result = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(rows[position])
+            position += 1
+        return result
+
+
+ingredient_index = IngredientIndex()
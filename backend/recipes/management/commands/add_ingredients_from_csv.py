@@ -1,30 +1,16 @@
-import os
-
-import csv
-from django.conf import settings
-from django.core.management.base import BaseCommand
-
-from recipes.constants import FILES
+from recipes.importer import CatalogueImportCommand
+from recipes.ingredient_index import IngredientIndex
 from recipes.models import Ingredient
 
 
-class Command(BaseCommand):
-    help = "Добавляет данные в модель Ingredient из .csv файлов в базу данных"
+class Command(CatalogueImportCommand):
+    help = "Загружает ингредиенты из .csv, .json или .jsonl в базу данных"
 
-    def handle(self, *args, **options):
-        dir = os.path.dirname(settings.BASE_DIR.parent)
-        path = dir + FILES.get("ingredients")
+    model = Ingredient
+    key_fields = ("name", "measurement_unit")
+    columns = ("name", "measurement_unit")
+    file_key = "ingredients"
 
-        with open(
-            file=path,
-            mode="r",
-            encoding="utf-8",
-        ) as f:
-            try:
-                Ingredient.objects.bulk_create(
-                    Ingredient(name=row[0], measurement_unit=row[1])
-                    for row in csv.reader(f)
-                )
-                self.stdout.write(self.style.SUCCESS("Success"))
-            except Exception as ex:
-                self.stdout.write(self.style.ERROR(ex))
+    def after_import(self, stats):
+        if stats["created"] or stats["updated"]:
+            IngredientIndex.invalidate()
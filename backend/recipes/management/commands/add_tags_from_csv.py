@@ -1,28 +1,18 @@
-import os
-
-import csv
-from django.conf import settings
-from django.core.management.base import BaseCommand
-
-from recipes.constants import FILES
+from recipes.constants import RECIPE_FEED_VERSION_KEY
+from recipes.importer import CatalogueImportCommand
 from recipes.models import Tag
+from recipes.versions import bump_version
+
 
+class Command(CatalogueImportCommand):
+    help = "Загружает теги из .csv, .json или .jsonl в базу данных"
 
-class Command(BaseCommand):
-    help = "Добавляет данные в модель Ingredient из .csv файлов в базу данных"
+    model = Tag
+    key_fields = ("slug",)
+    update_fields = ("name",)
+    columns = ("name", "slug")
+    file_key = "tags"
 
-    def handle(self, *args, **options):
-        dir = os.path.dirname(settings.BASE_DIR.parent)
-        path = dir + FILES.get("tags")
-        with open(
-            file=path,
-            mode="r",
-            encoding="utf-8",
-        ) as f:
-            try:
-                Tag.objects.bulk_create(
-                    Tag(name=row[0], slug=row[1]) for row in csv.reader(f)
-                )
-                self.stdout.write(self.style.SUCCESS("Success"))
-            except Exception as ex:
-                self.stdout.write(self.style.ERROR(ex))
+    def after_import(self, stats):
+        if stats["created"] or stats["updated"]:
+            bump_version(RECIPE_FEED_VERSION_KEY)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from recipes.constants import RECIPE_TRANSFER_BATCH_SIZE
+from recipes.models import Recipe
+from recipes.transfer import export_rows, ndjson_lines
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в NDJSON (по рецепту на строку)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="Файл для выгрузки (по умолчанию stdout)"
+        )
+        parser.add_argument("--author", help="Только рецепты автора")
+        parser.add_argument(
+            "--batch-size", type=int, default=RECIPE_TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options["author"]:
+            queryset = queryset.filter(author__username=options["author"])
+        lines = ndjson_lines(
+            export_rows(queryset, batch_size=options["batch_size"])
+        )
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8") as file:
+            file.writelines(lines)
@@ -0,0 +1,49 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.constants import RECIPE_TRANSFER_BATCH_SIZE
+from recipes.transfer import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = "Загружает рецепты из NDJSON, созданного export_recipes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл NDJSON или - для stdin")
+        parser.add_argument(
+            "--images-dir",
+            help="Каталог, относительно которого ищутся изображения",
+        )
+        parser.add_argument(
+            "--author", help="Автор для строк без поля author"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=RECIPE_TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть больше нуля")
+        importer = RecipeImporter(
+            batch_size=options["batch_size"],
+            images_dir=options["images_dir"],
+            default_author=options["author"],
+            progress=lambda count: self.stdout.write(
+                f"Обработано строк: {count}"
+            ),
+        )
+        if options["path"] == "-":
+            stats = importer.run(sys.stdin)
+        else:
+            try:
+                with open(options["path"], encoding="utf-8") as file:
+                    stats = importer.run(file)
+            except OSError as error:
+                raise CommandError(error)
+        for error in importer.errors:
+            self.stderr.write("Строка {line}: {error}".format(**error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Создано: {created}, с ошибками: {errors}".format(**stats)
+            )
+        )
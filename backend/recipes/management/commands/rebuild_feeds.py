@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Перестраивает материализованные ленты подписок "
+        "по текущему FEED_MATERIALIZE_THRESHOLD"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild()
+        self.stdout.write(self.style.SUCCESS("Success"))
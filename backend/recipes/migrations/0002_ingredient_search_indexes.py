@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+POSTGRES_INDEXES = (
+    (
+        "recipes_ingredient_name_lower_pattern_idx",
+        "CREATE INDEX IF NOT EXISTS {name} ON recipes_ingredient "
+        "(LOWER(name) text_pattern_ops)",
+    ),
+    (
+        "recipes_ingredient_name_lower_trgm_idx",
+        "CREATE INDEX IF NOT EXISTS {name} ON recipes_ingredient "
+        "USING gin (LOWER(name) gin_trgm_ops)",
+    ),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql.format(name=name))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
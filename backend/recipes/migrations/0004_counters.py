@@ -0,0 +1,63 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+COUNTERS = (
+    ("User", "recipes_count", "Recipe", "author"),
+    ("User", "followers_count", "Follow", "author"),
+    ("Recipe", "favorites_count", "FavouriteRecipe", "recipe"),
+    ("Recipe", "in_carts_count", "ShoppingBusket", "recipe"),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for model_name, counter, related_name, field in COUNTERS:
+        related_model = apps.get_model("recipes", related_name)
+        apps.get_model("recipes", model_name).objects.using(
+            schema_editor.connection.alias
+        ).update(**{
+            counter: Coalesce(
+                Subquery(
+                    related_model.objects.filter(**{field: OuterRef("pk")})
+                    .order_by()
+                    .values(field)
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                Value(0),
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_shortlink'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество добавлений в корзину'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
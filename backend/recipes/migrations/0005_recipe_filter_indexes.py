@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    """Удаляет повторы (user, recipe) перед созданием ограничений."""
+    db_alias = schema_editor.connection.alias
+    for model_name in ("FavouriteRecipe", "ShoppingBusket"):
+        model = apps.get_model("recipes", model_name)
+        duplicates = (
+            model.objects.using(db_alias)
+            .values("user", "recipe")
+            .annotate(first_id=Min("id"), count=Count("id"))
+            .filter(count__gt=1)
+        )
+        for duplicate in duplicates:
+            model.objects.using(db_alias).filter(
+                user=duplicate["user"], recipe=duplicate["recipe"]
+            ).exclude(id=duplicate["first_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-created_at'], name='recipe_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at'], name='recipe_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['is_active', 'created_at'], name='recipe_active_created_idx'),
+        ),
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favouriterecipe',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='recipes_favouriterecipe_user_recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingbusket',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='recipes_shoppingbusket_user_recipe'),
+        ),
+    ]
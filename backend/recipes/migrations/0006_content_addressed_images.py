@@ -0,0 +1,25 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+import recipes.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Изображение', null=True, storage=recipes.images.ContentAddressedStorage(), upload_to='static/'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=recipes.images.ContentAddressedStorage(), upload_to='static/', verbose_name='Аватар'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_following_count(apps, schema_editor):
+    Follow = apps.get_model("recipes", "Follow")
+    apps.get_model("recipes", "User").objects.using(
+        schema_editor.connection.alias
+    ).update(
+        following_count=Coalesce(
+            Subquery(
+                Follow.objects.filter(user=OuterRef("pk"))
+                .order_by()
+                .values("user")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписок'),
+        ),
+        migrations.RunPython(fill_following_count, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-created_at'], name='feed_entry_user_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='feed_entry_user_recipe'),
+        ),
+    ]
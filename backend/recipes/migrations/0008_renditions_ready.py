@@ -0,0 +1,55 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:54
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+from recipes.constants import AVATAR_RENDITIONS, RECIPE_RENDITIONS
+from recipes.images import rendition_name
+
+
+def mark_existing_renditions(apps, schema_editor):
+    """Отмечает файлы, копии которых уже лежат в хранилище."""
+    alias = schema_editor.connection.alias
+    for model_name, field_name, renditions in (
+        ("Recipe", "image", RECIPE_RENDITIONS),
+        ("User", "avatar", AVATAR_RENDITIONS),
+    ):
+        model = apps.get_model("recipes", model_name)
+        names = (
+            model.objects.using(alias)
+            .exclude(**{field_name: ""})
+            .exclude(**{f"{field_name}__isnull": True})
+            .values_list(field_name, flat=True)
+            .distinct()
+        )
+        for name in names:
+            if all(
+                default_storage.exists(rendition_name(name, rendition))
+                for rendition in renditions
+            ):
+                model.objects.using(alias).filter(
+                    **{field_name: name}
+                ).update(**{f"{field_name}_renditions_for": name})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_following_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions_for',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Изображение, для которого созданы копии'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_renditions_for',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Аватар, для которого созданы копии'),
+        ),
+        migrations.RunPython(
+            mark_existing_renditions, migrations.RunPython.noop
+        ),
+    ]
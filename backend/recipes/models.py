@@ -1,11 +1,15 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinLengthValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
 
 from recipes.constants import (
     MAX_LENGTH_EMAIL,
     MAX_LENGTH_MEASURE_CHAR_FIELD,
     MAX_LENGTH_RECIPE_CHAR_FIELD,
+    MAX_LENGTH_RENDITIONS_FOR,
+    MAX_LENGTH_SHORT_LINK_CODE,
     MAX_LENGTH_TAG_CHAR_FIELD,
     MAX_LENGTH_USER_CHAR_FIELD,
     MAX_LENGTH_USERNAME,
@@ -14,6 +18,8 @@ from recipes.constants import (
     MIN_DURATION_VALUE,
     MIN_LENGTH_PASSWORD,
 )
+from recipes.images import ContentAddressedStorage
+from recipes.utils import encode_base62
 
 
 class User(AbstractUser):
@@ -27,7 +33,17 @@ class User(AbstractUser):
         validators=[MinLengthValidator(MIN_LENGTH_PASSWORD)],
     )
     avatar = models.ImageField(
-        "Аватар", upload_to="static/", blank=True, null=True
+        "Аватар",
+        upload_to="static/",
+        storage=ContentAddressedStorage(),
+        blank=True,
+        null=True,
+    )
+    avatar_renditions_for = models.CharField(
+        "Аватар, для которого созданы копии",
+        max_length=MAX_LENGTH_RENDITIONS_FOR,
+        blank=True,
+        editable=False,
     )
     email = models.CharField(
         max_length=MAX_LENGTH_EMAIL,
@@ -41,6 +57,15 @@ class User(AbstractUser):
     last_name = models.CharField(
         "last name", max_length=MAX_LENGTH_USERNAME
     )
+    recipes_count = models.PositiveIntegerField(
+        "Количество рецептов", default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0, editable=False
+    )
+    following_count = models.PositiveIntegerField(
+        "Количество подписок", default=0, editable=False
+    )
 
     class Meta:
         verbose_name = "Пользователи"
@@ -74,13 +99,58 @@ class Tag(IdDateFieldModel):
         help_text="Наименование",
         db_index=True
     )
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
 
     class Meta(IdDateFieldModel.Meta):
         verbose_name = "Тег"
         verbose_name_plural = "Теги"
 
 
+class IngredientQuerySet(models.QuerySet):
+    """
+    Поиск ингредиентов по началу и части названия.
+
+    В PostgreSQL условия строятся над LOWER(name), чтобы их обслуживали
+    индексы из миграции 0002_ingredient_search_indexes. В SQLite
+    используются обычные регистронезависимые lookup'ы.
+    """
+
+    def search_conditions(self, name):
+        if connection.vendor != "postgresql":
+            return (
+                self,
+                Q(name__istartswith=name),
+                Q(name__icontains=name),
+            )
+        name = name.lower()
+        return (
+            self.annotate(name_lower=Lower("name")),
+            Q(name_lower__startswith=name),
+            Q(name_lower__contains=name)
+            | Q(name_lower__trigram_similar=name),
+        )
+
+    def name_startswith(self, name):
+        queryset, prefix, _ = self.search_conditions(name)
+        return queryset.filter(prefix)
+
+    def autocomplete(self, name, limit):
+        """
+        Подсказки для поля ввода ингредиента.
+
+        Сначала идут совпадения по началу названия, затем по части
+        названия и, в PostgreSQL, похожие названия (pg_trgm).
+        """
+        queryset, prefix, condition = self.search_conditions(name.strip())
+        return queryset.filter(condition).annotate(
+            rank=Case(
+                When(prefix, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by("rank", "name")[:limit]
+
+
 class Ingredient(IdDateFieldModel):
 
     name = models.CharField(
@@ -93,6 +163,8 @@ class Ingredient(IdDateFieldModel):
         max_length=MAX_LENGTH_MEASURE_CHAR_FIELD, help_text="Единица измерения"
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta(IdDateFieldModel.Meta):
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
@@ -134,15 +206,44 @@ class Recipe(IdDateFieldModel):
         ],
     )
     image = models.ImageField(
-        upload_to="static/", blank=True, null=True, help_text="Изображение"
+        upload_to="static/",
+        storage=ContentAddressedStorage(),
+        blank=True,
+        null=True,
+        help_text="Изображение",
+    )
+    image_renditions_for = models.CharField(
+        "Изображение, для которого созданы копии",
+        max_length=MAX_LENGTH_RENDITIONS_FOR,
+        blank=True,
+        editable=False,
     )
     tags = models.ManyToManyField(Tag, verbose_name="Список тегов")
+    favorites_count = models.PositiveIntegerField(
+        "Количество добавлений в избранное", default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        "Количество добавлений в корзину", default=0, editable=False
+    )
 
     class Meta(IdDateFieldModel.Meta):
         default_related_name = "recipes"
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at"], name="recipe_created_idx"
+            ),
+            models.Index(
+                fields=["author", "-created_at"],
+                name="recipe_author_created_idx",
+            ),
+            models.Index(
+                fields=["is_active", "created_at"],
+                name="recipe_active_created_idx",
+            ),
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -188,19 +289,12 @@ class RecipeUserFieldModel(models.Model):
     class Meta:
         abstract = True
         ordering = ["user"]
-
-    @classmethod
-    def set_constraints(cls, model):
-        model._meta.constraints.append(
+        constraints = [
             models.UniqueConstraint(
                 fields=["user", "recipe"],
-                name=f"{model._meta.app_label}_{cls.__name__}_user_recipe",
+                name="%(app_label)s_%(class)s_user_recipe",
             )
-        )
-
-    @classmethod
-    def setup(cls):
-        cls.set_constraints(cls)
+        ]
 
     def __str__(self):
         name = f"{self.user.username} - {self.recipe.name}"
@@ -249,5 +343,72 @@ class Follow(models.Model):
         return name[:MAX_STR]
 
 
-ShoppingBusket.setup()
-FavouriteRecipe.setup()
+class ShortLinkManager(models.Manager):
+
+    def get_for_recipe(self, recipe_id):
+        """
+        Возвращает короткую ссылку рецепта, создавая её при необходимости.
+
+        Код — номер рецепта в base62, поэтому повторный вызов отдаёт
+        ту же ссылку, а создание не требует внешних сервисов.
+        """
+        short_link, _ = self.get_or_create(
+            recipe_id=recipe_id, defaults={"code": encode_base62(recipe_id)}
+        )
+        return short_link
+
+
+class ShortLink(models.Model):
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="short_link",
+        verbose_name="Рецепт",
+    )
+    code = models.CharField(
+        max_length=MAX_LENGTH_SHORT_LINK_CODE,
+        unique=True,
+        help_text="Код короткой ссылки",
+    )
+
+    objects = ShortLinkManager()
+
+    class Meta:
+        verbose_name = "Короткая ссылка"
+        verbose_name_plural = "Короткие ссылки"
+
+    def __str__(self):
+        return self.code
+
+
+class FeedEntry(models.Model):
+    """
+    Рецепт в материализованной ленте подписок пользователя.
+
+    Заполняется только для пользователей, у которых подписок не меньше
+    FEED_MATERIALIZE_THRESHOLD (см. recipes.feed).
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="feed_entry_user_recipe"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="feed_entry_user_created_idx",
+            ),
+        ]
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from functools import partial
+
+from recipes import feed
+from recipes.constants import (
+    AVATAR_RENDITIONS,
+    RECIPE_FEED_VERSION_KEY,
+    RECIPE_RENDITIONS,
+)
+from recipes.counters import change_counter
+from recipes.images import renditions_ready, schedule_renditions
+from recipes.ingredient_index import IngredientIndex
+from recipes.models import (
+    FavouriteRecipe,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingBusket,
+    Tag,
+    User,
+)
+from recipes.versions import bump_version
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    IngredientIndex.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_feed(sender, **kwargs):
+    bump_version(RECIPE_FEED_VERSION_KEY)
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipe_feed_on_profile_change(sender, update_fields, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_version(RECIPE_FEED_VERSION_KEY)
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", 1)
+        transaction.on_commit(partial(feed.fan_out, instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", -1)
+
+
+@receiver(post_save, sender=Follow)
+def increase_followers_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "followers_count", 1)
+        change_counter(User, instance.user_id, "following_count", 1)
+        feed.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def decrease_followers_count(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "followers_count", -1)
+    change_counter(User, instance.user_id, "following_count", -1)
+    feed.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=FavouriteRecipe)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "favorites_count", 1)
+
+
+@receiver(post_delete, sender=FavouriteRecipe)
+def decrease_favorites_count(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "favorites_count", -1)
+
+
+@receiver(post_save, sender=ShoppingBusket)
+def increase_in_carts_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "in_carts_count", 1)
+
+
+@receiver(post_delete, sender=ShoppingBusket)
+def decrease_in_carts_count(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "in_carts_count", -1)
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_renditions(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(schedule_renditions, instance.image, RECIPE_RENDITIONS)
+    )
+
+
+@receiver(post_save, sender=User)
+def create_avatar_renditions(sender, instance, update_fields, **kwargs):
+    if update_fields and "avatar" not in update_fields:
+        return
+    transaction.on_commit(
+        partial(schedule_renditions, instance.avatar, AVATAR_RENDITIONS)
+    )
+
+
+@receiver(renditions_ready)
+def mark_renditions_ready(sender, field_name, name, **kwargs):
+    """
+    Отмечает у всех объектов с файлом name, что копии готовы.
+
+    Вместе с updated_at меняются ETag рецепта и версия кэша ленты, иначе
+    клиенты ещё долго получали бы пустой image_renditions.
+    """
+    ready_field = f"{field_name}_renditions_for"
+    values = {ready_field: name}
+    if any(field.name == "updated_at" for field in sender._meta.fields):
+        values["updated_at"] = timezone.now()
+    updated = sender.objects.filter(**{field_name: name}).exclude(
+        **{ready_field: name}
+    ).update(**values)
+    if updated:
+        bump_version(RECIPE_FEED_VERSION_KEY)
@@ -0,0 +1,306 @@
+"""
+Массовый перенос рецептов в формате NDJSON (JSON-объект на строку).
+
+Строка экспорта:
+
+    {"name": ..., "text": ..., "cooking_time": 10, "author": "username",
+     "image": "static/ab/ab12....jpg", "tags": ["breakfast"],
+     "ingredients": [{"name": ..., "measurement_unit": "г", "amount": 5}]}
+
+Изображение передаётся именем файла в хранилище, а не base64. Экспорт
+и импорт идут пачками фиксированного размера, поэтому память не зависит
+от числа рецептов. Ингредиенты и теги при импорте сопоставляются по
+словарям в памяти, рецепты, их ингредиенты и теги пишутся bulk_create
+в одной транзакции на пачку.
+"""
+import os
+
+import json
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.db import connection, transaction
+from functools import partial
+from itertools import chain, islice
+
+from recipes import feed
+from recipes.constants import (
+    MAX_LENGTH_RECIPE_CHAR_FIELD,
+    MIN_AMOUNT_VALUE,
+    MIN_DURATION_VALUE,
+    RECIPE_FEED_VERSION_KEY,
+    RECIPE_RENDITIONS,
+    RECIPE_TRANSFER_BATCH_SIZE,
+    RECIPE_TRANSFER_ERRORS_LIMIT,
+)
+from recipes.counters import refresh_counters
+from recipes.images import schedule_renditions
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+from recipes.versions import bump_version
+
+
+MAX_SMALL_INTEGER = 32767
+
+
+def export_batches(queryset=None, batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+    """
+    Рецепты queryset пачками — списками словарей формата NDJSON.
+
+    Пачки выбираются по возрастанию pk (keyset), ингредиенты и теги
+    каждой пачки — двумя запросами. Асинхронный экспорт забирает
+    каждую пачку отдельным вызовом через sync_to_async.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    queryset = queryset.select_related("author").order_by("pk")
+    last_pk = 0
+    while True:
+        recipes = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not recipes:
+            return
+        pks = [recipe.pk for recipe in recipes]
+        ingredients = {}
+        for recipe_id, name, unit, amount in (
+            RecipeIngredient.objects.filter(recipe__in=pks)
+            .order_by("pk")
+            .values_list(
+                "recipe_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        ):
+            ingredients.setdefault(recipe_id, []).append(
+                {"name": name, "measurement_unit": unit, "amount": amount}
+            )
+        tags = {}
+        for recipe_id, slug in Recipe.tags.through.objects.filter(
+            recipe__in=pks
+        ).values_list("recipe_id", "tag__slug"):
+            tags.setdefault(recipe_id, []).append(slug)
+        yield [
+            {
+                "name": recipe.name,
+                "text": recipe.text,
+                "cooking_time": recipe.cooking_time,
+                "author": recipe.author.username,
+                "image": recipe.image.name or None,
+                "tags": tags.get(recipe.pk, []),
+                "ingredients": ingredients.get(recipe.pk, []),
+            }
+            for recipe in recipes
+        ]
+        last_pk = pks[-1]
+
+
+def export_rows(queryset=None, batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+    """Рецепты queryset как словари формата NDJSON."""
+    return chain.from_iterable(export_batches(queryset, batch_size))
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def positive_int(value, minimum, field):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{field}: ожидается целое число")
+    if not minimum <= value <= MAX_SMALL_INTEGER:
+        raise ValueError(
+            f"{field}: значение от {minimum} до {MAX_SMALL_INTEGER}"
+        )
+    return value
+
+
+def text_field(row, field):
+    value = row.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{field}: обязательное поле")
+    if len(value) > MAX_LENGTH_RECIPE_CHAR_FIELD:
+        raise ValueError(
+            f"{field}: не длиннее {MAX_LENGTH_RECIPE_CHAR_FIELD} символов"
+        )
+    return value
+
+
+class RecipeImporter:
+    """
+    Импорт рецептов из строк NDJSON.
+
+    Ошибочные строки пропускаются и попадают в errors (не больше
+    RECIPE_TRANSFER_ERRORS_LIMIT, общее число — в stats["errors"]).
+    Изображение ищется в хранилище по имени, а если задан images_dir —
+    берётся из этого каталога и сохраняется в хранилище.
+    """
+
+    def __init__(
+        self,
+        batch_size=RECIPE_TRANSFER_BATCH_SIZE,
+        images_dir=None,
+        default_author=None,
+        progress=None,
+    ):
+        self.batch_size = batch_size
+        self.images_dir = images_dir and os.path.realpath(images_dir)
+        self.default_author = default_author
+        self.progress = progress
+        self.storage = Recipe._meta.get_field("image").storage
+        self.tags = dict(Tag.objects.values_list("slug", "pk"))
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                "pk", "name", "measurement_unit"
+            )
+        }
+        self.stats = {"created": 0, "errors": 0}
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.stats["errors"] += 1
+        if len(self.errors) < RECIPE_TRANSFER_ERRORS_LIMIT:
+            self.errors.append({"line": line_number, "error": message})
+
+    def image_name(self, name):
+        if not name:
+            return None
+        if not isinstance(name, str):
+            raise ValueError("image: ожидается имя файла")
+        if self.images_dir:
+            path = os.path.realpath(os.path.join(self.images_dir, name))
+            if not path.startswith(self.images_dir + os.sep):
+                raise ValueError("image: путь вне каталога изображений")
+            if os.path.isfile(path):
+                with open(path, "rb") as image:
+                    field = Recipe._meta.get_field("image")
+                    return self.storage.save(
+                        field.generate_filename(None, os.path.basename(path)),
+                        File(image),
+                    )
+        try:
+            exists = self.storage.exists(name)
+        except SuspiciousFileOperation:
+            exists = False
+        if not exists:
+            raise ValueError(f"image: файл {name} не найден")
+        return name
+
+    def parse(self, row, authors):
+        """Рецепт, количества по ингредиентам и теги из строки."""
+        username = row.get("author") or self.default_author
+        if username not in authors:
+            raise ValueError(f"author: пользователь {username} не найден")
+        tag_ids = set()
+        for slug in row.get("tags") or ():
+            if slug not in self.tags:
+                raise ValueError(f"tags: тег {slug} не найден")
+            tag_ids.add(self.tags[slug])
+        amounts = {}
+        for item in row.get("ingredients") or ():
+            key = (item.get("name"), item.get("measurement_unit"))
+            if key not in self.ingredients:
+                raise ValueError(
+                    "ingredients: ингредиент {} ({}) не найден".format(*key)
+                )
+            if self.ingredients[key] in amounts:
+                raise ValueError(
+                    f"ingredients: ингредиент {key[0]} повторяется"
+                )
+            amounts[self.ingredients[key]] = positive_int(
+                item.get("amount"), MIN_AMOUNT_VALUE, "amount"
+            )
+        if not amounts:
+            raise ValueError("ingredients: нужен хотя бы один ингредиент")
+        recipe = Recipe(
+            name=text_field(row, "name"),
+            text=text_field(row, "text"),
+            cooking_time=positive_int(
+                row.get("cooking_time"), MIN_DURATION_VALUE, "cooking_time"
+            ),
+            author_id=authors[username],
+            image=self.image_name(row.get("image")),
+        )
+        return recipe, amounts, tag_ids
+
+    def import_batch(self, lines):
+        """lines — пары (номер строки, строка)."""
+        rows = []
+        for number, line in lines:
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                self.error(number, str(error))
+                continue
+            if not isinstance(row, dict):
+                self.error(number, "ожидается JSON-объект")
+                continue
+            rows.append((number, row))
+        usernames = {self.default_author} | {
+            row.get("author") for _, row in rows
+        }
+        authors = dict(
+            User.objects.filter(
+                username__in=[name for name in usernames if name]
+            ).values_list("username", "pk")
+        )
+        parsed = []
+        for number, row in rows:
+            try:
+                parsed.append(self.parse(row, authors))
+            except (ValueError, TypeError, AttributeError) as error:
+                self.error(number, str(error))
+        if not parsed:
+            return
+        with transaction.atomic():
+            recipes = [recipe for recipe, _, _ in parsed]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Recipe.objects.bulk_create(recipes)
+            else:
+                # SQLite в Django 3.2 не возвращает pk из bulk_create.
+                for recipe in recipes:
+                    recipe.save(force_insert=True)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for recipe, amounts, _ in parsed
+                for ingredient_id, amount in amounts.items()
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe, _, tag_ids in parsed
+                for tag_id in tag_ids
+            )
+            refresh_counters(Recipe, {recipe.author_id for recipe in recipes})
+            transaction.on_commit(partial(feed.fan_out_many, recipes))
+            for recipe in recipes:
+                if recipe.image:
+                    transaction.on_commit(
+                        partial(
+                            schedule_renditions,
+                            recipe.image,
+                            RECIPE_RENDITIONS,
+                        )
+                    )
+        self.stats["created"] += len(recipes)
+
+    def run(self, lines):
+        """Импортирует строки NDJSON (str или bytes), пустые пропускает."""
+        numbered = (
+            (number, line)
+            for number, line in enumerate(lines, start=1)
+            if line.strip()
+        )
+        processed = 0
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            processed += len(batch)
+            if self.progress:
+                self.progress(processed)
+        if self.stats["created"]:
+            bump_version(RECIPE_FEED_VERSION_KEY)
+        return self.stats
@@ -0,0 +1,13 @@
+from recipes.constants import BASE62_ALPHABET
+
+
+def encode_base62(number):
+    """Переводит неотрицательное целое в строку base62."""
+    base = len(BASE62_ALPHABET)
+    if number == 0:
+        return BASE62_ALPHABET[0]
+    digits = []
+    while number:
+        number, remainder = divmod(number, base)
+        digits.append(BASE62_ALPHABET[remainder])
+    return "".join(reversed(digits))
@@ -0,0 +1,16 @@
+import time
+from django.core.cache import cache
+
+
+def get_version(key):
+    """Текущая версия данных, общая для всех воркеров через кэш."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Записывает новую версию, делая устаревшими все ключи со старой."""
+    cache.set(key, time.time_ns(), None)